@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import queue
 import threading
+from collections import deque
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -11,6 +12,9 @@ from .config import Settings
 from .storage import Storage
 from .llm_providers import LLMProvider
 
+# Put into an agent inbox to wake the worker and make it exit
+_STOP = object()
+
 
 @dataclass
 class AgentSpec:
@@ -29,12 +33,19 @@ class AgentWorker(threading.Thread):
         self.settings = settings
         self.storage = storage
         self.provider = provider
-        self.inbox: "queue.Queue[str]" = queue.Queue()
-        self._stop = threading.Event()
+        self.inbox: "queue.Queue[object]" = queue.Queue()
+        # Not named _stop: that would shadow threading.Thread._stop and break is_alive()/join()
+        self._stop_event = threading.Event()
         self._on_assistant_message = on_assistant_message
+        # Rolling LLM context kept in RAM; the DB is only read once here (e.g. resumed sessions)
+        self._ctx: "deque[Dict[str, str]]" = deque(maxlen=settings.max_context_messages)
+        for m in storage.iter_messages(spec.session_id):
+            if m.role in ("user", "assistant"):
+                self._ctx.append({"role": m.role, "content": m.content})
 
     def stop(self):
-        self._stop.set()
+        self._stop_event.set()
+        self.inbox.put(_STOP)
 
     def submit(self, text: str):
         self.inbox.put(text)
@@ -42,25 +53,30 @@ class AgentWorker(threading.Thread):
     def run(self):
         # Initial announce
         self.storage.add_message(self.spec.session_id, "system", f"Agent {self.spec.name} gestartet. Projekt: {self.spec.project_path or '-'}")
-        while not self._stop.is_set():
-            try:
-                user_text = self.inbox.get(timeout=0.5)
-            except queue.Empty:
-                continue
-            self.storage.add_message(self.spec.session_id, "user", user_text)
-
-            # Build context
-            msgs = []
-            history = self.storage.get_messages(self.spec.session_id, limit=self.settings.max_context_messages)
-            for m in history:
-                if m.role in ("user", "assistant"):
-                    msgs.append({"role": m.role, "content": m.content})
+        while True:
+            user_text = self.inbox.get()
+            if user_text is _STOP or self._stop_event.is_set():
+                break
+
+            # The current turn is persisted together with the reply below; every early exit
+            # still records the user message on its own
+            self._ctx.append({"role": "user", "content": user_text})
 
+            reply = None
             try:
-                reply = self.provider.generate(self.settings.system_prompt, msgs, model=self.spec.model)
+                reply = self.provider.generate(self.settings.system_prompt, list(self._ctx), model=self.spec.model, cancel_event=self._stop_event)
             except Exception as e:
                 reply = f"[Fehler bei LLM-Abfrage: {e}]"
-            msg_id = self.storage.add_message(self.spec.session_id, "assistant", reply)
+            finally:
+                if reply is None:
+                    # generate() died with something other than an Exception
+                    self.storage.add_messages(self.spec.session_id, [("user", user_text)])
+            if self._stop_event.is_set():
+                # Stopped mid-call: keep the user turn, but don't persist or announce a possibly aborted reply
+                self.storage.add_messages(self.spec.session_id, [("user", user_text)])
+                break
+            self._ctx.append({"role": "assistant", "content": reply})
+            self.storage.add_messages(self.spec.session_id, [("user", user_text), ("assistant", reply)])
             if self._on_assistant_message:
                 try:
                     self._on_assistant_message(self.spec, reply)
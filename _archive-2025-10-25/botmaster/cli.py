@@ -1,88 +1,274 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import os
+import signal
 import sys
-import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+import orjson
+
 from .config import load_settings
-from .storage import Storage
-from .llm_providers import make_provider
-from .agent_runtime import AgentManager, AgentSpec
-from .telegram_client import TelegramClient, TelegramConfig
 
+# Console-script entry points (see pyproject.toml)
+__all__ = ["main", "daemon", "send_cli"]
+
+PROJECT_MARKERS = (".git", "pyproject.toml", "package.json", "requirements.txt", "Cargo.toml", ".claude", ".claude-flow")
+# Never descended into during project discovery: VCS metadata and dependency/tool caches only.
+# Generic names (build, dist, target, ...) may be real projects and are scanned as usual
+IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__",
+    ".tox", ".pytest_cache", ".mypy_cache", ".ruff_cache", ".gradle",
+})
+# Threads listing directories during project discovery
+DISCOVERY_WORKERS = 16
+# Per base dir project scans, kept in settings.data_dir
+PROJECT_CACHE_FILE = "project_cache.json"
+# Next Telegram update_id, kept in settings.data_dir
+TELEGRAM_OFFSET_FILE = "telegram-offset.json"
+# Projects per page of the Telegram project picker
+PROJECTS_PAGE_SIZE = 10
+
+
+def _is_project_dir(p: str | Path) -> bool:
+    # One existence probe per marker instead of listing the whole directory
+    try:
+        return any(os.access(os.path.join(p, m), os.F_OK) for m in PROJECT_MARKERS)
+    except (OSError, ValueError):
+        return False
 
-def _is_project_dir(p: Path) -> bool:
-    markers = [".git", "pyproject.toml", "package.json", "requirements.txt", "Cargo.toml", ".claude", ".claude-flow"]
+
+def _mtime(path: str | Path) -> int:
     try:
-        names = {c.name for c in p.iterdir()}
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _scan_dir(root: str | Path) -> list[tuple[str, str, bool, int]]:
+    """(path, name, is project dir, mtime_ns) of every subdirectory of root"""
+    children: list[tuple[str, str, bool, int]] = []
+    try:
+        # DirEntry.is_dir() answers from the directory listing, no stat() per child
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.name not in IGNORED_DIRS and entry.is_dir():
+                    # A child's mtime changes when a project or marker appears inside it
+                    children.append((entry.path, entry.name, _is_project_dir(entry.path), entry.stat().st_mtime_ns))
     except Exception:
-        return False
-    for m in markers:
-        if m in names:
-            return True
-    return False
+        pass
+    return children
 
 
-def _discover_projects(paths: list[Path], max_depth: int = 3, max_results: int = 200) -> dict[str, Path]:
+def _discover_projects(
+    paths: list[Path],
+    max_depth: int = 3,
+    max_results: int = 200,
+    walked: dict[str, int] | None = None,
+) -> dict[str, Path]:
+    """Projects under paths; if given, walked collects the mtime of every directory looked at"""
     result: dict[str, Path] = {}
-    count = 0
-    def visit(root: Path, depth: int):
-        nonlocal count
-        if count >= max_results or depth > max_depth:
-            return
-        try:
-            for entry in root.iterdir():
-                if count >= max_results:
-                    return
-                if not entry.is_dir():
+    # Listings are I/O-bound (slow on network mounts): each level is fetched concurrently
+    # while the walk itself stays depth-first, so results and their order are unchanged
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS) as pool:
+        def expand(listing: Future, depth: int):
+            children = listing.result()
+            if walked is not None:
+                walked.update((path, mtime) for path, _, _, mtime in children)
+            # Recurse further regardless, to catch nested projects
+            nested = [pool.submit(_scan_dir, path) if depth < max_depth else None for path, _, _, _ in children]
+            return zip(children, nested), depth
+
+        for base in paths:
+            if len(result) >= max_results:
+                break
+            if walked is not None:
+                walked[str(base)] = _mtime(base)
+            if not base.exists():
+                continue
+            # Explicit stack of open listings instead of recursion, same depth-first order
+            stack = [expand(pool.submit(_scan_dir, base), 0)]
+            while stack and len(result) < max_results:
+                entries, depth = stack[-1]
+                item = next(entries, None)
+                if item is None:
+                    stack.pop()
                     continue
-                if _is_project_dir(entry):
-                    key = entry.name.lower().replace(" ", "-")
+                (path, name, is_project, _), sub = item
+                if is_project:
+                    key = name.lower().replace(" ", "-")
                     if key not in result:
-                        result[key] = entry
-                        count += 1
-                # Recurse further regardless, to catch nested projects
-                visit(entry, depth + 1)
+                        result[key] = Path(path)
+                if sub is not None:
+                    stack.append(expand(sub, depth + 1))
+        pool.shutdown(cancel_futures=True)  # drop prefetches past max_results
+    return result
+
+
+def _dirs_changed(dirs: dict[str, int]) -> bool:
+    """True if any directory of a scan was modified, created or removed since (one stat each)"""
+    return any(_mtime(path) != mtime for path, mtime in dirs.items())
+
+
+def _load_projects(
+    paths: list[Path],
+    cache_file: Path | None,
+    refresh: bool = False,
+    max_results: int = 200,
+) -> tuple[dict[str, Path], dict[str, int]]:
+    """Projects under paths and the directory mtimes they depend on.
+
+    A base dir's cached scan is reused only while none of the directories it walked changed;
+    a new project at any depth touches the mtime of the directory it was created in.
+    """
+    cache: dict = {}
+    if cache_file and not refresh:
+        try:
+            cache = orjson.loads(cache_file.read_bytes())
         except Exception:
-            return
+            cache = {}
+    dirty = False
+    result: dict[str, Path] = {}
+    dirs: dict[str, int] = {}
     for base in paths:
-        if base.exists():
-            visit(base, 0)
-    return result
+        entry = cache.get(str(base))
+        if not entry or "dirs" not in entry or _dirs_changed(entry["dirs"]):
+            walked: dict[str, int] = {}
+            found = _discover_projects([base], max_results=max_results, walked=walked)
+            entry = cache[str(base)] = {"dirs": walked, "projects": {k: str(p) for k, p in found.items()}}
+            dirty = True
+        dirs.update(entry["dirs"])
+        for key, path in entry["projects"].items():
+            if len(result) >= max_results:
+                break
+            result.setdefault(key, Path(path))
+    if dirty and cache_file:
+        try:
+            cache_file.write_bytes(orjson.dumps(cache))
+        except OSError:
+            pass
+    return result, dirs
+
+
+# (directory mtimes, projects, sorted slugs) of the last scan
+_projects_cache: tuple[dict[str, int], dict[str, Path], list[str]] | None = None
+
+
+def _cached_projects(paths: list[Path], cache_file: Path | None = None, refresh: bool = False) -> tuple[dict[str, Path], list[str]]:
+    """Projects and sorted slugs; rescans when a scanned directory changed or refresh is set"""
+    global _projects_cache
+    if refresh or _projects_cache is None or _dirs_changed(_projects_cache[0]):
+        projects, dirs = _load_projects(paths, cache_file, refresh=refresh)
+        _projects_cache = (dirs, projects, sorted(projects))
+    return _projects_cache[1], _projects_cache[2]
+
+
+def _project_keyboards(slugs: list[str], page_size: int = PROJECTS_PAGE_SIZE) -> list[dict]:
+    """Inline keyboard for every page of the project picker"""
+    pages = []
+    for start in range(0, len(slugs), page_size):
+        end = min(start + page_size, len(slugs))
+        rows = [
+            [{"text": slug, "callback_data": f"proj:{slug}"} for slug in slugs[i:min(i + 2, end)]]
+            for i in range(start, end, 2)
+        ]
+        page = start // page_size
+        nav = []
+        if page > 0:
+            nav.append({"text": "◀️ Zurück", "callback_data": f"projpage:{page-1}"})
+        if end < len(slugs):
+            nav.append({"text": "Weiter ▶️", "callback_data": f"projpage:{page+1}"})
+        if nav:
+            rows.append(nav)
+        pages.append({"inline_keyboard": rows})
+    return pages
+
+
+HELP_TEXT = (
+    "botMaster Hilfe\n"
+    "/help - diese Hilfe\n"
+    "/agents - aktive und bekannte Agenten\n"
+    "/projects - Projekte durchsuchen und Agent starten\n"
+    "/projects refresh - Projektverzeichnisse neu durchsuchen\n"
+    "/new [project_key] [name] - Agent sofort starten\n"
+    "/to <id> <text> - Nachricht an Agent\n"
+    "/stop <id> - Agent stoppen\n"
+    "\nNachrichten ohne '/' gehen direkt an den BotMaster-Basisagenten."
+)
+
+
+# (path, mtime_ns, text) of the last instructions file read
+_instr_cache: tuple[str, int, str] | None = None
+
+
+def _load_instructions(path: str | None) -> str | None:
+    """Agent instructions text; the file is only re-read after its mtime changed"""
+    global _instr_cache
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if _instr_cache and _instr_cache[0] == path and _instr_cache[1] == mtime:
+            return _instr_cache[2]
+        text = Path(path).read_text(encoding='utf-8')
+    except Exception:
+        return None
+    _instr_cache = (path, mtime, text)
+    return text
 
 
 def send_cli():
     parser = argparse.ArgumentParser(description="Sendet eine Nachricht an Telegram per Bot")
     parser.add_argument("message", help="Text der Nachricht")
     args = parser.parse_args()
+    _send(args.message)
+
+
+def _send(message: str) -> None:
+    from .telegram_client import TelegramClient, TelegramConfig
+
     settings = load_settings()
     if not settings.telegram_bot_token or not settings.telegram_chat_id:
         print("Bitte TELEGRAM_BOT_TOKEN und TELEGRAM_CHAT_ID setzen.", file=sys.stderr)
         sys.exit(2)
     tg = TelegramClient(TelegramConfig(settings.telegram_bot_token, settings.telegram_chat_id))
-    tg.send_message(args.message)
+    tg.send_message(message)
 
 
 def daemon():
+    # Imported here so `botmaster projects` does not pay for storage, providers and requests
+    from .storage import Storage
+    from .llm_providers import make_provider
+    from .agent_runtime import AgentManager, AgentSpec
+    from .telegram_client import TelegramClient, TelegramConfig
+
     settings = load_settings()
     storage = Storage(settings.db_url)
     # Telegram client (optional)
     tg = None
     if settings.telegram_bot_token and settings.telegram_chat_id:
-        tg = TelegramClient(TelegramConfig(settings.telegram_bot_token, settings.telegram_chat_id))
+        tg = TelegramClient(
+            TelegramConfig(settings.telegram_bot_token, settings.telegram_chat_id),
+            offset_path=settings.data_dir / TELEGRAM_OFFSET_FILE,
+        )
+
+    # Per-agent message header, built on the agent's first message
+    tg_headers: dict[int, str] = {}
 
     def push_agent_msg(spec, text: str):
         if not tg:
             return
-        header = f"Agent #{spec.id} {spec.name}"
-        project = f"Projekt: {spec.project_path or '-'}"
-        body = text
-        # keep formatting simple/plain to avoid Telegram markdown issues
-        tg.send_message(f"{header}\n{project}\n\n{body}")
+        header = tg_headers.get(spec.id)
+        if header is None:
+            # keep formatting simple/plain to avoid Telegram markdown issues
+            header = tg_headers[spec.id] = f"Agent #{spec.id} {spec.name}\nProjekt: {spec.project_path or '-'}\n\n"
+        tg.send_message_async(header + text)
 
     # Provider factory: per-agent customization for claude-cli
+    @functools.lru_cache(maxsize=1)  # probe once per daemon, not once per spawned agent
     def _detect_claude_bin() -> str:
         # Try configured value first
         bin_candidate = settings.claude_cli_bin.strip() if settings.claude_cli_bin else ""
@@ -90,10 +276,9 @@ def daemon():
             return bin_candidate
         # Fallbacks: try native 'claude', then via WSL
         try:
-            import shutil, subprocess
+            import shutil
+            # Being on PATH is enough; a 'claude -V' run added latency but no information
             if shutil.which("claude"):
-                # quick version check
-                subprocess.run(["claude", "-V"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=3)
                 return "claude"
         except Exception:
             pass
@@ -109,12 +294,7 @@ def daemon():
 
     def provider_factory(name: str, project_path: str | None, model: str | None):
         # Per-agent provider (Claude CLI or others)
-        instructions_text = None
-        if settings.agent_instructions_path and Path(settings.agent_instructions_path).exists():
-            try:
-                instructions_text = Path(settings.agent_instructions_path).read_text(encoding='utf-8')
-            except Exception:
-                instructions_text = None
+        instructions_text = _load_instructions(settings.agent_instructions_path)
         claude_bin = _detect_claude_bin()
         try:
             return make_provider(
@@ -125,14 +305,16 @@ def daemon():
                 settings.default_model,
                 provider_cmd=settings.provider_cmd,
                 provider_timeout_sec=settings.provider_timeout_sec,
+                provider_cmd_persistent=settings.provider_cmd_persistent,
                 claude_cli_bin=claude_bin,
                 mcp_config_path=settings.mcp_config_path,
                 cwd=project_path,
                 instructions=instructions_text,
+                cache=settings.llm_cache,
             )
         except Exception as e:
             if tg:
-                tg.send_message(f"Provider-Fehler: {e}\nBitte prüfe die Installation von 'claude' (native oder WSL).")
+                tg.send_message_async(f"Provider-Fehler: {e}\nBitte prüfe die Installation von 'claude' (native oder WSL).")
             raise
 
     # Default provider instance for non-claude-cli modes (used when factory not needed)
@@ -149,13 +331,14 @@ def daemon():
         if base_agent is None:
             base_agent = manager.spawn(name="botmaster-core", project_path=None)
             if tg:
-                tg.send_message(
+                tg.send_message_async(
                     f"Basis-Agent #{base_agent.id} gestartet. Nachrichten ohne '/' gehen automatisch an ihn."
                 )
         return base_agent
 
-    projects = _discover_projects(settings.project_dirs)
-    project_slugs = sorted(projects.keys())
+    # Warm the project index at startup; handlers re-check it lazily
+    project_cache = settings.data_dir / PROJECT_CACHE_FILE
+    _cached_projects(settings.project_dirs, project_cache)
 
     # Start Telegram polling
     if not tg:
@@ -163,41 +346,93 @@ def daemon():
     else:
 
         def _send_help():
-            message = (
-                "botMaster Hilfe\n"
-                "/help - diese Hilfe\n"
-                "/agents - aktive und bekannte Agenten\n"
-                "/projects - Projekte durchsuchen und Agent starten\n"
-                "/new [project_key] [name] - Agent sofort starten\n"
-                "/to <id> <text> - Nachricht an Agent\n"
-                "/stop <id> - Agent stoppen\n"
-                "\nNachrichten ohne '/' gehen direkt an den BotMaster-Basisagenten."
-            )
-            tg.send_message(message)
+            tg.send_message_async(HELP_TEXT)
 
-        def _send_projects(page: int = 0, page_size: int = 10):
+        # (slugs, keyboard per page) of the last project listing; rebuilt only after a rescan
+        project_pages: tuple[list[str], list[dict]] | None = None
+
+        def _send_projects(page: int = 0, refresh: bool = False):
+            nonlocal project_pages
+            projects, project_slugs = _cached_projects(settings.project_dirs, project_cache, refresh=refresh)
             if not projects:
-                tg.send_message("Keine Projekte gefunden. Passe BM_PROJECT_DIRS an.")
+                tg.send_message_async("Keine Projekte gefunden. Passe BM_PROJECT_DIRS an.")
                 return
-            start = page * page_size
-            end = min(start + page_size, len(project_slugs))
-            rows = []
-            row = []
-            for slug in project_slugs[start:end]:
-                row.append({"text": slug, "callback_data": f"proj:{slug}"})
-                if len(row) == 2:
-                    rows.append(row)
-                    row = []
-            if row:
-                rows.append(row)
-            nav = []
-            if page > 0:
-                nav.append({"text": "◀️ Zurück", "callback_data": f"projpage:{page-1}"})
-            if end < len(project_slugs):
-                nav.append({"text": "Weiter ▶️", "callback_data": f"projpage:{page+1}"})
-            if nav:
-                rows.append(nav)
-            tg.send_message("Wähle ein Projekt:", reply_markup={"inline_keyboard": rows})
+            if project_pages is None or project_pages[0] is not project_slugs:
+                project_pages = (project_slugs, _project_keyboards(project_slugs))
+            pages = project_pages[1]
+            tg.send_message_async("Wähle ein Projekt:", reply_markup=pages[min(max(page, 0), len(pages) - 1)])
+
+        def _cmd_unknown(parts: list[str]):
+            tg.send_message_async('Unbekannter Befehl. /help für Übersicht.')
+
+        def _cmd_help(parts: list[str]):
+            _send_help()
+
+        def _cmd_projects(parts: list[str]):
+            _send_projects(0, refresh=len(parts) > 1 and parts[1].lower() == "refresh")
+
+        def _cmd_agents(parts: list[str]):
+            running = manager.list_agents()
+            listing = storage.list_agents()
+            lines = ["Aktive Agent-IDs: " + (", ".join(map(str, running)) or '-')]
+            for a in listing[:10]:
+                lines.append(f"#{a['id']} {a['name']} [{a['status']}] -> {a.get('project_path') or '-'}")
+            tg.send_message_async("\n".join(lines))
+
+        def _cmd_new(parts: list[str]):
+            if len(parts) == 1:
+                _send_projects(0)
+                return
+            proj_key = parts[1].lower()
+            name = " ".join(parts[2:]) if len(parts) > 2 else f"agent-{proj_key}"
+            projects, _ = _cached_projects(settings.project_dirs, project_cache)
+            project_path = str(projects.get(proj_key)) if proj_key in projects else None
+            try:
+                spec = manager.spawn(name=name, project_path=project_path)
+            except Exception as e:
+                tg.send_message_async(f"Fehler beim Start: {e}")
+                return
+            tg.send_message_async(
+                f"Agent #{spec.id} '{name}' gestartet. Projekt: {project_path or '-'}\n"
+                f"Nutze '/to {spec.id} <text>' für Nachrichten."
+            )
+
+        def _cmd_stop(parts: list[str]):
+            if len(parts) < 2:
+                _cmd_unknown(parts)
+                return
+            try:
+                aid = int(parts[1])
+            except ValueError:
+                tg.send_message_async('Ungültige Agent-ID')
+                return
+            ok = manager.stop(aid)
+            tg.send_message_async(f"Agent #{aid} {'gestoppt' if ok else 'nicht gefunden'}.")
+
+        def _cmd_to(parts: list[str]):
+            if len(parts) < 3:
+                _cmd_unknown(parts)
+                return
+            try:
+                aid = int(parts[1])
+            except ValueError:
+                tg.send_message_async('Ungültige Agent-ID')
+                return
+            msg = " ".join(parts[2:])
+            if not manager.submit(aid, msg):
+                tg.send_message_async('Agent nicht gefunden.')
+            else:
+                tg.send_message_async(f"(an #{aid}) OK")
+
+        handlers = {
+            '/start': _cmd_help,
+            '/help': _cmd_help,
+            '/projects': _cmd_projects,
+            '/agents': _cmd_agents,
+            '/new': _cmd_new,
+            '/stop': _cmd_stop,
+            '/to': _cmd_to,
+        }
 
         def on_msg(text: str, raw: dict):
             if not text:
@@ -208,74 +443,14 @@ def daemon():
 
             if stripped.startswith('/'):
                 parts = stripped.split()
-                cmd = parts[0].lower()
-
-                if cmd in ('/start', '/help'):
-                    _send_help()
-                    return
-
-                if cmd == '/projects':
-                    _send_projects(0)
-                    return
-
-                if cmd == '/agents':
-                    running = manager.list_agents()
-                    listing = storage.list_agents()
-                    lines = ["Aktive Agent-IDs: " + (", ".join(map(str, running)) or '-')]
-                    for a in listing[:10]:
-                        lines.append(f"#{a['id']} {a['name']} [{a['status']}] -> {a.get('project_path') or '-'}")
-                    tg.send_message("\n".join(lines))
-                    return
-
-                if cmd == '/new':
-                    if len(parts) == 1:
-                        _send_projects(0)
-                        return
-                    proj_key = parts[1].lower()
-                    name = " ".join(parts[2:]) if len(parts) > 2 else f"agent-{proj_key}"
-                    project_path = str(projects.get(proj_key)) if proj_key in projects else None
-                    try:
-                        spec = manager.spawn(name=name, project_path=project_path)
-                    except Exception as e:
-                        tg.send_message(f"Fehler beim Start: {e}")
-                        return
-                    tg.send_message(
-                        f"Agent #{spec.id} '{name}' gestartet. Projekt: {project_path or '-'}\n"
-                        f"Nutze '/to {spec.id} <text>' für Nachrichten."
-                    )
-                    return
-
-                if cmd == '/stop' and len(parts) >= 2:
-                    try:
-                        aid = int(parts[1])
-                    except ValueError:
-                        tg.send_message('Ungültige Agent-ID')
-                        return
-                    ok = manager.stop(aid)
-                    tg.send_message(f"Agent #{aid} {'gestoppt' if ok else 'nicht gefunden'}.")
-                    return
-
-                if cmd == '/to' and len(parts) >= 3:
-                    try:
-                        aid = int(parts[1])
-                    except ValueError:
-                        tg.send_message('Ungültige Agent-ID')
-                        return
-                    msg = " ".join(parts[2:])
-                    if not manager.submit(aid, msg):
-                        tg.send_message('Agent nicht gefunden.')
-                    else:
-                        tg.send_message(f"(an #{aid}) OK")
-                    return
-
-                tg.send_message('Unbekannter Befehl. /help für Übersicht.')
+                handlers.get(parts[0].lower(), _cmd_unknown)(parts)
                 return
 
             spec = get_base_agent()
             if not manager.submit(spec.id, text):
-                tg.send_message('Basis-Agent nicht verfügbar.')
+                tg.send_message_async('Basis-Agent nicht verfügbar.')
             else:
-                tg.send_message(f"(an #{spec.id}) -> gesendet")
+                tg.send_message_async(f"(an #{spec.id}) -> gesendet")
 
 
         if settings.enable_telegram_polling:
@@ -290,13 +465,14 @@ def daemon():
                     handled = True
                 elif data.startswith('proj:'):
                     slug = data.split(':', 1)[1]
+                    projects, _ = _cached_projects(settings.project_dirs, project_cache)
                     project_path = str(projects.get(slug)) if slug in projects else None
                     try:
                         spec = manager.spawn(name=f'agent-{slug}', project_path=project_path)
                     except Exception as e:
-                        tg.send_message(f"Start fehlgeschlagen: {e}")
+                        tg.send_message_async(f"Start fehlgeschlagen: {e}")
                     else:
-                        tg.send_message(
+                        tg.send_message_async(
                             f"Agent #{spec.id} gestartet für Projekt {slug}.\n"
                             f"Nutze '/to {spec.id} <text>' für Nachrichten."
                         )
@@ -304,21 +480,37 @@ def daemon():
 
                 ack()
                 if not handled and data:
-                    tg.send_message('Unbekannte Auswahl.')
+                    tg.send_message_async('Unbekannte Auswahl.')
 
 
 
-            tg.start_polling(on_msg, on_callback=on_callback)
-            tg.send_message("botMaster Daemon gestartet. Antworten werden hier gespiegelt.")
-            _send_help()
+            if settings.telegram_webhook_url:
+                tg.start_webhook(settings.telegram_webhook_url, settings.telegram_webhook_port, on_msg, on_callback=on_callback)
+            else:
+                try:
+                    # getUpdates is refused while a webhook from an earlier run is registered
+                    tg.delete_webhook()
+                except Exception:
+                    pass
+                tg.start_polling(on_msg, on_callback=on_callback)
+            # Greeting and help go out as one message
+            tg.send_message_async("botMaster Daemon gestartet. Antworten werden hier gespiegelt.\n\n" + HELP_TEXT)
             get_base_agent()
 
-    # Keep the daemon alive
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
+    # Keep the daemon alive until SIGINT/SIGTERM
+    stop = threading.Event()
+
+    def _request_stop(*_):
+        stop.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    # POSIX runs the handler during a blocking wait; Windows only between timed waits
+    wait_timeout = 1.0 if os.name == "nt" else None
+    while not stop.wait(wait_timeout):
         pass
+    if tg:
+        tg.stop()
 
 
 def main():
@@ -327,18 +519,19 @@ def main():
 
     sub.add_parser("send", help="Sendet eine Nachricht an Telegram").add_argument("message")
     sub.add_parser("daemon", help="Startet den Orchestrator und Telegram-Poller")
-    sub.add_parser("projects", help="Zeigt gefundene Projekte")
+    projects_cmd = sub.add_parser("projects", help="Zeigt gefundene Projekte")
+    projects_cmd.add_argument("--no-cache", action="store_true", help="Projektverzeichnisse neu durchsuchen")
 
     args = parser.parse_args()
     if args.cmd == "send":
-        os.execvp(sys.executable, [sys.executable, "-m", "botmaster.cli", "__send__", args.message])
+        _send(args.message)
         return
     if args.cmd == "daemon":
         daemon()
         return
     if args.cmd == "projects":
         s = load_settings()
-        pr = _discover_projects(s.project_dirs)
+        pr, _ = _load_projects(s.project_dirs, s.data_dir / PROJECT_CACHE_FILE, refresh=args.no_cache)
         if not pr:
             print("Keine Projekte gefunden.")
         else:
@@ -346,15 +539,4 @@ def main():
                 print(f"{k}: {p}")
         return
 
-    # hidden subcommand for script entry
-    if len(sys.argv) >= 3 and sys.argv[1] == "__send__":
-        msg = " ".join(sys.argv[2:])
-        settings = load_settings()
-        if not settings.telegram_bot_token or not settings.telegram_chat_id:
-            print("Bitte TELEGRAM_BOT_TOKEN und TELEGRAM_CHAT_ID setzen.", file=sys.stderr)
-            sys.exit(2)
-        tg = TelegramClient(TelegramConfig(settings.telegram_bot_token, settings.telegram_chat_id))
-        tg.send_message(msg)
-        return
-
     parser.print_help()
@@ -1,12 +1,19 @@
+import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+
+# Env values read as true by _bool
+_TRUTHY = frozenset({"1", "true", "yes", "y", "on"})
+
 
 def _bool(val: str | None, default: bool = False) -> bool:
     if val is None:
         return default
-    return val.strip().lower() in {"1", "true", "yes", "y", "on"}
+    return val.strip().lower() in _TRUTHY
 
 
 @dataclass
@@ -23,9 +30,12 @@ class Settings:
     default_model: str | None
     provider_cmd: str | None
     provider_timeout_sec: int
+    # Keep the provider command running between calls (JSON lines protocol)
+    provider_cmd_persistent: bool
     claude_cli_bin: str
     mcp_config_path: str | None
     agent_instructions_path: str | None
+    llm_cache: bool
 
     # Storage
     data_dir: Path
@@ -38,6 +48,9 @@ class Settings:
     system_prompt: str
     max_context_messages: int
     enable_telegram_polling: bool
+    # Public HTTPS URL for Telegram to push updates to; polling is used when unset
+    telegram_webhook_url: str | None
+    telegram_webhook_port: int
 
 
 def load_settings() -> Settings:
@@ -55,7 +68,16 @@ def load_settings() -> Settings:
         # sensible Windows defaults per user description
         r"C:\myFolder\Port\projects;C:\myFolder\Port\myTools;C:\myFolder\Port\myTools\toolbox",
     )
-    project_dirs = [Path(p.strip()) for p in project_dirs_env.split(";") if p.strip()]
+    # Missing bases are dropped once here instead of being stat'ed on every project scan
+    project_dirs: list[Path] = []
+    for p in project_dirs_env.split(";"):
+        p = p.strip()
+        if not p:
+            continue
+        if os.path.isdir(p):
+            project_dirs.append(Path(p))
+        else:
+            logger.warning("BM_PROJECT_DIRS: %s ist kein Verzeichnis, wird ignoriert", p)
 
     return Settings(
         telegram_bot_token=os.getenv("TELEGRAM_BOT_TOKEN"),
@@ -67,9 +89,11 @@ def load_settings() -> Settings:
         default_model=os.getenv("BM_DEFAULT_MODEL"),
         provider_cmd=os.getenv("BM_PROVIDER_CMD"),
         provider_timeout_sec=int(os.getenv("BM_PROVIDER_TIMEOUT", "90")),
+        provider_cmd_persistent=_bool(os.getenv("BM_PROVIDER_CMD_PERSISTENT")),
         claude_cli_bin=os.getenv("BM_CLAUDE_CLI_BIN", "claude"),
         mcp_config_path=os.getenv("BM_MCP_CONFIG_PATH"),
         agent_instructions_path=os.getenv("BM_AGENT_INSTRUCTIONS_PATH"),
+        llm_cache=_bool(os.getenv("BM_LLM_CACHE")),
         data_dir=data_dir,
         db_url=db_url,
         project_dirs=project_dirs,
@@ -83,4 +107,6 @@ def load_settings() -> Settings:
         ),
         max_context_messages=int(os.getenv("BM_MAX_CONTEXT_MESSAGES", "20")),
         enable_telegram_polling=_bool(os.getenv("BM_ENABLE_TELEGRAM_POLLING", "1")),
+        telegram_webhook_url=os.getenv("BM_TELEGRAM_WEBHOOK_URL"),
+        telegram_webhook_port=int(os.getenv("BM_TELEGRAM_WEBHOOK_PORT", "8443")),
     )
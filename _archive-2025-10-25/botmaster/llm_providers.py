@@ -1,16 +1,107 @@
 from __future__ import annotations
 
+import logging
 import os
 import requests
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Iterator, List, Dict, Optional
 import subprocess
-import json
+import selectors
 import shlex
+import shutil
 import sys
 import threading
 import time
 import queue
 import uuid
+import functools
+import hashlib
+from collections import OrderedDict
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# (connect, read): fail fast on unreachable hosts, leave room for slow completions
+_HTTP_TIMEOUT = (5, 60)
+
+# Returned instead of a reply when cancel_event was set before/while the call ran
+_CANCELLED = "[cancelled]"
+
+# Pushed by the Claude-CLI reader when a turn is finished (stream-json "result" event or EOF)
+_EOM = object()
+
+
+_SHARED_SESSION: Optional[requests.Session] = None
+_SHARED_SESSION_LOCK = threading.Lock()
+
+
+def _split_command(command: str) -> Optional[List[str]]:
+    """argv for a command string, or None if it can't be split faithfully (leave it to the shell).
+
+    Windows (non-POSIX) splitting keeps quotes in the tokens; they are stripped from around a token so
+    shutil.which finds the file and list2cmdline doesn't escape them a second time. Quotes inside a
+    token (--opt="a b") are split differently by shlex than by Windows, so those strings return None.
+    """
+    try:
+        if os.name != "nt":
+            return shlex.split(command)
+        argv = []
+        for token in shlex.split(command, posix=False):
+            if len(token) > 1 and token[0] == token[-1] and token[0] in "\"'":
+                token = token[1:-1]
+            if '"' in token or "'" in token:
+                return None
+            argv.append(token)
+        return argv
+    except ValueError:  # unbalanced quotes
+        return None
+
+
+class _RateLimitRetry(Retry):
+    """urllib3's default retry rules (idempotent methods only), plus 429 for any method:
+    a rate-limited POST was refused, not run, so resending it can't bill twice. Retry-After is honoured."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _shared_session() -> requests.Session:
+    """One keep-alive pool for all provider instances, so N agents share connections to each API host."""
+    global _SHARED_SESSION
+    with _SHARED_SESSION_LOCK:
+        if _SHARED_SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20,
+                max_retries=_RateLimitRetry(total=2, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+            )
+            session.mount("https://", adapter)
+            _SHARED_SESSION = session
+        return _SHARED_SESSION
+
+
+def _sse_events(r: requests.Response, cancel_event: Optional[threading.Event]) -> Iterator[dict]:
+    """JSON payloads of the `data:` lines of a server-sent event stream; stops early when cancelled."""
+    with r:
+        r.raise_for_status()
+        # chunk_size=None hands over data as it arrives instead of waiting for fixed-size blocks
+        for line in r.iter_lines(chunk_size=None):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                return
+            try:
+                yield orjson.loads(data)
+            except orjson.JSONDecodeError:
+                continue
 
 
 class LLMProvider:
@@ -20,83 +111,140 @@ class LLMProvider:
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: float = 0.2,
+        cancel_event: Optional[threading.Event] = None,
     ) -> str:
+        # cancel_event: set by the caller (e.g. a stopping agent) to abandon the call as early as possible
         raise NotImplementedError
 
+    def stream(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        # Reply text in chunks as it arrives; providers without streaming yield the whole reply once
+        yield self.generate(system_prompt, messages, model=model, temperature=temperature, cancel_event=cancel_event)
+
 
 class AnthropicProvider(LLMProvider):
     def __init__(self, api_key: str, default_model: Optional[str] = None):
         self.api_key = api_key
         self.default_model = default_model or "claude-3-5-sonnet-latest"
-
-    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2) -> str:
-        url = "https://api.anthropic.com/v1/messages"
-        headers = {
+        self._session = _shared_session()
+        self._url = "https://api.anthropic.com/v1/messages"
+        self._headers = {
             "Content-Type": "application/json",
-            "x-api-key": self.api_key,
+            "x-api-key": api_key,
             "anthropic-version": "2023-06-01",
         }
+        # (system_prompt, prebuilt system blocks), same idea as OpenAIProvider._system
+        self._system: tuple = (None, [])
+
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
+        reply = "".join(self.stream(system_prompt, messages, model=model, temperature=temperature, cancel_event=cancel_event))
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
+        return reply
+
+    def stream(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+        cached_prompt, system = self._system
+        if cached_prompt != system_prompt:
+            # The system prompt is the stable prefix of every call: let Anthropic cache it server-side
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}] if system_prompt else []
+            self._system = (system_prompt, system)
         payload = {
             "model": model or self.default_model,
             "max_tokens": 1024,
             "temperature": temperature,
-            "system": system_prompt,
             "messages": messages,
+            "stream": True,
         }
-        r = requests.post(url, json=payload, headers=headers, timeout=60)
-        r.raise_for_status()
-        data = r.json()
-        # Anthropic returns content list
-        content = data.get("content", [])
-        if content and isinstance(content, list):
-            for part in content:
-                if part.get("type") == "text":
-                    return part.get("text", "")
-        return ""
+        if system:
+            payload["system"] = system
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        r = self._session.post(self._url, data=orjson.dumps(payload), headers=self._headers, timeout=_HTTP_TIMEOUT, stream=True)
+        for event in _sse_events(r, cancel_event):
+            typ = event.get("type")
+            if typ == "content_block_delta":
+                delta = event.get("delta") or {}
+                if delta.get("type") == "text_delta" and delta.get("text"):
+                    yield delta["text"]
+            elif typ == "message_start":
+                if logger.isEnabledFor(logging.DEBUG):
+                    usage = (event.get("message") or {}).get("usage") or {}
+                    logger.debug(
+                        "anthropic prompt cache: read=%s created=%s uncached=%s",
+                        usage.get("cache_read_input_tokens"), usage.get("cache_creation_input_tokens"), usage.get("input_tokens"),
+                    )
+            elif typ == "error":
+                raise RuntimeError(f"Anthropic stream error: {event.get('error')}")
 
 
 class OpenAIProvider(LLMProvider):
     def __init__(self, api_key: str, default_model: Optional[str] = None):
         self.api_key = api_key
         self.default_model = default_model or "gpt-4o-mini"
-
-    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2) -> str:
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
+        self._session = _shared_session()
+        self._url = "https://api.openai.com/v1/chat/completions"
+        self._headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {api_key}",
         }
-        oai_msgs = []
-        if system_prompt:
-            oai_msgs.append({"role": "system", "content": system_prompt})
-        oai_msgs.extend(messages)
+        # (system_prompt, prebuilt system message list); the prompt rarely changes between calls
+        self._system: tuple = (None, [])
+
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
+        reply = "".join(self.stream(system_prompt, messages, model=model, temperature=temperature, cancel_event=cancel_event))
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
+        return reply
+
+    def stream(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+        cached_prompt, prefix = self._system
+        if cached_prompt != system_prompt:
+            prefix = [{"role": "system", "content": system_prompt}] if system_prompt else []
+            self._system = (system_prompt, prefix)
         payload = {
             "model": model or self.default_model,
             "temperature": temperature,
-            "messages": oai_msgs,
+            "messages": prefix + messages,
+            "stream": True,
         }
-        r = requests.post(url, json=payload, headers=headers, timeout=60)
-        r.raise_for_status()
-        data = r.json()
-        choice = (data.get("choices") or [{}])[0]
-        return choice.get("message", {}).get("content", "")
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        r = self._session.post(self._url, data=orjson.dumps(payload), headers=self._headers, timeout=_HTTP_TIMEOUT, stream=True)
+        for event in _sse_events(r, cancel_event):
+            choice = (event.get("choices") or [{}])[0]
+            text = (choice.get("delta") or {}).get("content")
+            if text:
+                yield text
 
 
 class GeminiProvider(LLMProvider):
     def __init__(self, api_key: str, default_model: Optional[str] = None):
         self.api_key = api_key
         self.default_model = default_model or "gemini-1.5-flash-latest"
-
-    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2) -> str:
+        self._session = _shared_session()
+        # Only the model name varies per call; the key travels in the query string
+        self._base_url = "https://generativelanguage.googleapis.com/v1beta/models/"
+        self._key_query = f"?key={api_key}"
+        self._headers = {"Content-Type": "application/json"}
+        # (system_prompt, prebuilt leading parts), same idea as OpenAIProvider._system
+        self._system: tuple = (None, [])
+
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
         mdl = model or self.default_model
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{mdl}:generateContent?key={self.api_key}"
+        url = f"{self._base_url}{mdl}:generateContent{self._key_query}"
         # Gemini expects a list of contents with role parts
-        parts = []
-        if system_prompt:
-            parts.append({"text": system_prompt})
-        for m in messages:
-            # collapse into plain text sequence
-            parts.append({"text": f"{m.get('role')}: {m.get('content')}"})
+        cached_prompt, prefix = self._system
+        if cached_prompt != system_prompt:
+            prefix = [{"text": system_prompt}] if system_prompt else []
+            self._system = (system_prompt, prefix)
+        # collapse the history into one plain text part
+        parts = prefix + [{"text": "\n".join(f"{m['role']}: {m['content']}" for m in messages)}] if messages else prefix
         payload = {
             "contents": [
                 {
@@ -109,15 +257,16 @@ class GeminiProvider(LLMProvider):
                 "maxOutputTokens": 1024,
             },
         }
-        r = requests.post(url, json=payload, timeout=60)
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
+        r = self._session.post(url, data=orjson.dumps(payload), headers=self._headers, timeout=_HTTP_TIMEOUT)
         r.raise_for_status()
-        data = r.json()
-        cands = data.get("candidates") or []
-        if cands:
-            parts = cands[0].get("content", {}).get("parts", [])
-            if parts:
-                return parts[0].get("text", "")
-        return ""
+        data = orjson.loads(r.content)
+        try:
+            return data["candidates"][0]["content"]["parts"][0].get("text", "")
+        except (KeyError, IndexError, TypeError):
+            # No candidates, e.g. a blocked prompt
+            return ""
 
 
 class CommandProvider(LLMProvider):
@@ -125,44 +274,126 @@ class CommandProvider(LLMProvider):
     Executes a user-specified command and exchanges a simple JSON payload via stdin/stdout.
     - Input JSON: { system, messages, model, temperature }
     - Output: either JSON with { text } or plain text on stdout.
+    - persistent: the command is started once and kept running; each request is one JSON line on
+      stdin and must be answered with one `{"text": ...}` line on stdout (other lines are ignored).
     """
 
-    def __init__(self, command: str, timeout_sec: int = 90):
+    # Anything a shell would interpret; such commands keep running through shell=True
+    _SHELL_METACHARS = frozenset("|&;<>*?$%^`\n")
+
+    def __init__(self, command: str, timeout_sec: int = 90, persistent: bool = False):
         self.command = command
         self.timeout_sec = timeout_sec
-
-    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2) -> str:
+        self.persistent = persistent
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._argv: Optional[List[str]] = None
+        if not any(c in self._SHELL_METACHARS for c in command):
+            argv = _split_command(command)
+            if argv:
+                argv[0] = shutil.which(argv[0]) or argv[0]
+                self._argv = argv
+
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
         payload = {
             "system": system_prompt,
             "messages": messages,
             "model": model,
             "temperature": temperature,
         }
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
+        if self.persistent:
+            # One request in flight per process: replies are matched to requests by order
+            with self._lock:
+                return self._generate_persistent(payload, cancel_event)
         try:
-            # Windows-friendly: use shell=True for command strings the user provides
+            # Simple commands run directly; only commands with shell syntax pay for a shell
             proc = subprocess.run(
-                self.command,
-                input=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                self._argv or self.command,
+                input=orjson.dumps(payload),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 timeout=self.timeout_sec,
-                shell=True,
+                shell=self._argv is None,
             )
         except subprocess.TimeoutExpired:
             return "[CommandProvider Timeout]"
+        except OSError as exc:
+            return f"[CommandProvider Error] {exc}"
         if proc.returncode != 0:
             err = proc.stderr.decode(errors="ignore")
             return f"[CommandProvider Error {proc.returncode}] {err.strip()}"
         out = proc.stdout.decode("utf-8", errors="ignore").strip()
         # Try JSON first
         try:
-            obj = json.loads(out)
+            obj = orjson.loads(out)
             if isinstance(obj, dict) and "text" in obj:
                 return str(obj["text"]) or ""
         except Exception:
             pass
         return out
 
+    def _ensure_started(self):
+        if self._proc and self._proc.poll() is None:
+            return
+        self._proc = subprocess.Popen(
+            self._argv or self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            shell=self._argv is None,
+        )
+        # Fresh queue per process so lines of a dead one never leak into the next reply
+        self._lines = queue.Queue()
+        threading.Thread(target=self._reader, args=(self._proc.stdout, self._lines), name="cmd-provider-reader", daemon=True).start()
+
+    @staticmethod
+    def _reader(stdout, lines: "queue.Queue[Optional[bytes]]"):
+        for line in iter(stdout.readline, b""):
+            lines.put(line)
+        lines.put(None)
+
+    def _kill(self):
+        # A reply still in flight would otherwise be taken as the answer to the next request
+        if self._proc and self._proc.poll() is None:
+            self._proc.kill()
+        self._proc = None
+
+    def _generate_persistent(self, payload: dict, cancel_event: Optional[threading.Event]) -> str:
+        try:
+            self._ensure_started()
+            self._proc.stdin.write(orjson.dumps(payload) + b"\n")
+            self._proc.stdin.flush()
+        except OSError as exc:
+            self._kill()
+            return f"[CommandProvider Error] {exc}"
+        lines = self._lines
+        deadline = time.monotonic() + self.timeout_sec
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._kill()
+                return "[CommandProvider Timeout]"
+            try:
+                line = lines.get(timeout=remaining if cancel_event is None else min(remaining, 0.25))
+            except queue.Empty:
+                if cancel_event is not None and cancel_event.is_set():
+                    self._kill()
+                    return _CANCELLED
+                continue
+            if line is None:
+                code = self._proc.wait() if self._proc else None
+                self._proc = None
+                return f"[CommandProvider Error {code}] Prozess beendet"
+            try:
+                obj = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(obj, dict) and "text" in obj:
+                return str(obj["text"]) or ""
+
 
 class ClaudeCLIStreamProvider(LLMProvider):
     """
@@ -173,11 +404,14 @@ class ClaudeCLIStreamProvider(LLMProvider):
     """
 
     def __init__(self, claude_bin: str = "claude", mcp_config_path: Optional[str] = None, cwd: Optional[str] = None, instructions: Optional[str] = None, session_id: Optional[str] = None, response_timeout: float = 120.0):
-        # claude_bin may be a full command string, e.g. "wsl -e claude"
+        # claude_bin may be a full command string, e.g. "wsl -e claude"; split once so we can spawn without a shell
         self.claude_bin = claude_bin
+        self._bin_argv = list(_cli_bin_argv(claude_bin))
         self.mcp_config_path = mcp_config_path
         self.cwd = cwd
         self.instructions = instructions
+        # Put in front of the first user message only
+        self._prelude = f"{instructions}\n\n---\n\nUser message:\n" if instructions else ""
         self.response_timeout = response_timeout
         self._proc: Optional[subprocess.Popen] = None
         self._reader_thread: Optional[threading.Thread] = None
@@ -185,16 +419,9 @@ class ClaudeCLIStreamProvider(LLMProvider):
         self._started = False
         self._first_message_sent = False
         self._session_id = session_id or str(uuid.uuid4())
-        self._queue: "queue.Queue[str]" = queue.Queue()
-        self._lock = threading.Lock()
-        self._last_error: Optional[str] = None
-        self._ready_event = threading.Event()
-
-    def _ensure_started(self):
-        if self._started and self._proc and self._proc.poll() is None:
-            return
-        args = [
-            self.claude_bin,
+        # Same argv for every (re)start of the CLI process
+        self._args = [
+            *self._bin_argv,
             "-p",
             "--verbose",
             "--input-format",
@@ -205,25 +432,66 @@ class ClaudeCLIStreamProvider(LLMProvider):
             self._session_id,
             "--dangerously-skip-permissions",
         ]
-        if self.mcp_config_path:
-            args += ["--mcp-config", self.mcp_config_path]
-
-        parts = args
-        command = " ".join(shlex.quote(p) for p in parts)
+        if mcp_config_path:
+            self._args += ["--mcp-config", mcp_config_path]
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._turn_lock = threading.Lock()
+        self._last_error: Optional[str] = None
+        self._ready_event = threading.Event()
 
+    def _ensure_started(self):
+        if self._started and self._proc and self._proc.poll() is None:
+            return
         self._proc = subprocess.Popen(
-            command,
+            self._args,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             cwd=self.cwd or None,
-            shell=True,
         )
         self._started = True
-        self._reader_thread = threading.Thread(target=self._reader, name="claude-cli-reader", daemon=True)
-        self._reader_thread.start()
-        self._stderr_thread = threading.Thread(target=self._stderr_reader, name="claude-cli-stderr", daemon=True)
-        self._stderr_thread.start()
+        if os.name == "nt":
+            # selectors only handle sockets on Windows, so keep one blocking reader per pipe there
+            self._reader_thread = threading.Thread(target=self._reader, name="claude-cli-reader", daemon=True)
+            self._reader_thread.start()
+            self._stderr_thread = threading.Thread(target=self._stderr_reader, name="claude-cli-stderr", daemon=True)
+            self._stderr_thread.start()
+        else:
+            self._reader_thread = threading.Thread(target=self._pump, args=(self._proc,), name="claude-cli-pump", daemon=True)
+            self._reader_thread.start()
+
+    def _pump(self, proc: subprocess.Popen):
+        """Single reader for stdout and stderr: non-blocking pipes multiplexed with a selector."""
+        sel = selectors.DefaultSelector()
+        for stream, handler in ((proc.stdout, self._handle_stdout_line), (proc.stderr, self._handle_stderr_line)):
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            sel.register(fd, selectors.EVENT_READ, (handler, bytearray()))
+        try:
+            while sel.get_map():
+                for key, _ in sel.select():
+                    handler, buf = key.data
+                    try:
+                        chunk = os.read(key.fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        chunk = b""
+                    if not chunk:
+                        sel.unregister(key.fd)
+                        if buf:
+                            handler(bytes(buf))
+                        if handler == self._handle_stdout_line:
+                            self._queue.put(_EOM)
+                        continue
+                    buf += chunk
+                    *lines, rest = buf.split(b"\n")
+                    buf[:] = rest
+                    for line in lines:
+                        handler(line)
+        finally:
+            sel.close()
 
     def _reader(self):
         while True:
@@ -234,33 +502,10 @@ class ClaudeCLIStreamProvider(LLMProvider):
             except Exception:
                 break
             if not line:
-                if self._proc.poll() is not None:
-                    break
-                time.sleep(0.05)
-                continue
-            text_line = line.decode("utf-8", errors="ignore").strip()
-            if not text_line:
-                continue
-            try:
-                msg = json.loads(text_line)
-            except Exception:
-                continue
-            typ = msg.get("type") or msg.get("message", {}).get("role")
-            if typ == "system" and msg.get("subtype") == "init":
-                self._ready_event.set()
-            if typ in ("assistant", "assistant_message"):
-                content = msg.get("message", {}).get("content") or msg.get("content") or ""
-                text = self._content_to_text(content)
-                if text:
-                    self._queue.put(text)
-            elif typ == "assistant_delta":
-                delta = msg.get("delta") or msg.get("message", {}).get("delta") or {}
-                text = self._content_to_text(delta.get("content"))
-                if text:
-                    self._queue.put(text)
-            elif typ == "error":
-                self._last_error = str(msg.get("error") or msg)
-                self._queue.put(f"[claude-cli error] {self._last_error}")
+                # readline() blocks on the pipe; an empty read only happens at EOF
+                self._queue.put(_EOM)
+                break
+            self._handle_stdout_line(line)
 
     def _stderr_reader(self):
         while True:
@@ -271,13 +516,42 @@ class ClaudeCLIStreamProvider(LLMProvider):
             except Exception:
                 break
             if not line:
-                if self._proc.poll() is not None:
-                    break
-                time.sleep(0.05)
-                continue
-            text = line.decode("utf-8", errors="ignore").strip()
+                break
+            self._handle_stderr_line(line)
+
+    def _handle_stdout_line(self, line: bytes):
+        # orjson parses bytes directly and tolerates surrounding whitespace, so no decode/strip copies
+        if not line or line.isspace():
+            return
+        try:
+            msg = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return
+        if not isinstance(msg, dict):
+            return
+        typ = msg.get("type") or msg.get("message", {}).get("role")
+        if typ == "system" and msg.get("subtype") == "init":
+            self._ready_event.set()
+        if typ in ("assistant", "assistant_message"):
+            content = msg.get("message", {}).get("content") or msg.get("content") or ""
+            text = self._content_to_text(content)
+            if text:
+                self._queue.put(text)
+        elif typ == "assistant_delta":
+            delta = msg.get("delta") or msg.get("message", {}).get("delta") or {}
+            text = self._content_to_text(delta.get("content"))
             if text:
-                self._last_error = text
+                self._queue.put(text)
+        elif typ == "error":
+            self._last_error = str(msg.get("error") or msg)
+            self._queue.put(f"[claude-cli error] {self._last_error}")
+        elif typ == "result":
+            self._queue.put(_EOM)
+
+    def _handle_stderr_line(self, line: bytes):
+        text = line.decode("utf-8", errors="ignore").strip()
+        if text:
+            self._last_error = text
 
     def _content_to_text(self, content) -> str:
         if not content:
@@ -297,7 +571,16 @@ class ClaudeCLIStreamProvider(LLMProvider):
             return content.get("text", "")
         return str(content)
 
-    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2) -> str:
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
+        # The CLI process, its reader thread and the reply queue are per instance, so a second turn in flight
+        # would swap the queue under the first. An AgentWorker never overlaps its own turns, but an
+        # AgentManager without provider_factory hands one instance to every worker
+        with self._turn_lock:
+            return self._generate_turn(messages, cancel_event)
+
+    def _generate_turn(self, messages: List[Dict[str, str]], cancel_event: Optional[threading.Event] = None) -> str:
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
         self._ensure_started()
         if not self._proc or not self._proc.stdin or not self._proc.stdout:
             return "[claude-cli not running]"
@@ -308,8 +591,8 @@ class ClaudeCLIStreamProvider(LLMProvider):
             if m.get("role") == "user":
                 user_content = m.get("content", "")
                 break
-        if self.instructions and not self._first_message_sent:
-            content = f"{self.instructions}\n\n---\n\nUser message:\n{user_content}"
+        if self._prelude and not self._first_message_sent:
+            content = self._prelude + user_content
             self._first_message_sent = True
         else:
             content = user_content
@@ -319,14 +602,10 @@ class ClaudeCLIStreamProvider(LLMProvider):
             "message": {"role": "user", "content": content},
             "session_id": self._session_id,
         }
-        payload = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        payload = orjson.dumps(obj) + b"\n"
         with self._lock:
-            # Flush queue before sending new message
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                except queue.Empty:
-                    break
+            # Drop leftovers from the previous turn: swap in a fresh queue (the reader re-reads self._queue per put)
+            self._queue = q = queue.Queue()
             try:
                 self._proc.stdin.write(payload)
                 self._proc.stdin.flush()
@@ -334,28 +613,27 @@ class ClaudeCLIStreamProvider(LLMProvider):
                 return f"[claude-cli write error] {exc}"
 
         parts: List[str] = []
-        deadline = time.time() + self.response_timeout
-        while time.time() < deadline:
-            remaining = deadline - time.time()
+        # monotonic: immune to wall-clock jumps; one clock read per wakeup
+        deadline = time.monotonic() + self.response_timeout
+        while True:
+            remaining = deadline - time.monotonic()
             if remaining <= 0:
                 break
             try:
-                chunk = self._queue.get(timeout=min(remaining, 5.0))
+                # With a cancel token wake up periodically to check it; otherwise just block until the deadline
+                chunk = q.get(timeout=remaining if cancel_event is None else min(remaining, 0.25))
             except queue.Empty:
-                continue
+                if cancel_event is not None and not cancel_event.is_set():
+                    continue
+                break
+            if chunk is _EOM:
+                break
             parts.append(chunk)
-            # Gather additional chunks briefly for smoother output
-            gather_deadline = time.time() + 0.5
-            while time.time() < gather_deadline:
-                try:
-                    more = self._queue.get(timeout=0.1)
-                    parts.append(more)
-                except queue.Empty:
-                    break
-            break
 
         if parts:
             return "".join(parts)
+        if cancel_event is not None and cancel_event.is_set():
+            return _CANCELLED
         if self._last_error:
             return f"[claude-cli stderr] {self._last_error}"
         if self._proc and self._proc.poll() is not None:
@@ -363,24 +641,119 @@ class ClaudeCLIStreamProvider(LLMProvider):
         return "[claude-cli timeout]"
 
 
-def make_provider(name: str, anthropic_key: Optional[str], openai_key: Optional[str], gemini_key: Optional[str], default_model: Optional[str] = None, provider_cmd: Optional[str] = None, provider_timeout_sec: int = 90, *, claude_cli_bin: Optional[str] = None, mcp_config_path: Optional[str] = None, cwd: Optional[str] = None, instructions: Optional[str] = None) -> LLMProvider:
-    key = name.strip().lower()
-    if key in ("anthropic", "claude"):
-        if not anthropic_key:
-            raise ValueError("ANTHROPIC_API_KEY fehlt.")
-        return AnthropicProvider(anthropic_key, default_model)
-    if key in ("openai", "oai"):
-        if not openai_key:
-            raise ValueError("OPENAI_API_KEY fehlt.")
-        return OpenAIProvider(openai_key, default_model)
-    if key in ("gemini", "google"):
-        if not gemini_key:
-            raise ValueError("GEMINI_API_KEY fehlt.")
-        return GeminiProvider(gemini_key, default_model)
-    if key in ("cmd", "local", "claude-code", "cursor"):
-        if not provider_cmd:
-            raise ValueError("BM_PROVIDER_CMD fehlt für lokalen/headless Provider.")
-        return CommandProvider(provider_cmd, timeout_sec=provider_timeout_sec)
-    if key in ("claude-cli", "claude-flow"):
-        return ClaudeCLIStreamProvider(claude_bin=claude_cli_bin or "claude", mcp_config_path=mcp_config_path, cwd=cwd, instructions=instructions)
-    raise ValueError(f"Unbekannter Provider: {name}")
+class CachingLLMProvider(LLMProvider):
+    """
+    Wraps another provider and memoizes deterministic (temperature == 0) replies.
+    - Key: sha256 over model, system prompt, messages and temperature.
+    - Bounded LRU; non-deterministic calls always go to the inner provider.
+    """
+
+    def __init__(self, inner: LLMProvider, max_entries: int = 256):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str], temperature: float) -> str:
+        blob = orjson.dumps({"m": model, "s": system_prompt, "msgs": messages, "t": temperature}, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(blob).hexdigest()
+
+    def generate(self, system_prompt: str, messages: List[Dict[str, str]], model: Optional[str] = None, temperature: float = 0.2, cancel_event: Optional[threading.Event] = None) -> str:
+        if temperature > 1e-9:
+            return self.inner.generate(system_prompt, messages, model=model, temperature=temperature, cancel_event=cancel_event)
+        key = self._key(system_prompt, messages, model, temperature)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        reply = self.inner.generate(system_prompt, messages, model=model, temperature=temperature, cancel_event=cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            # Possibly partial or a cancel marker; never serve that again
+            return reply
+        with self._lock:
+            self._cache[key] = reply
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return reply
+
+
+@functools.lru_cache(maxsize=16)
+def _cli_bin_argv(claude_bin: str) -> tuple:
+    """argv prefix for a claude_bin command string, with the executable resolved on PATH once per string"""
+    argv = _split_command(claude_bin)
+    if argv is None:
+        raise ValueError(f"Claude-CLI-Befehl lässt sich nicht ohne Shell aufrufen: {claude_bin}")
+    argv = argv or ["claude"]
+    # Resolves PATHEXT shims such as claude.cmd on Windows
+    argv[0] = shutil.which(argv[0]) or argv[0]
+    return tuple(argv)
+
+
+def _make_anthropic(opts: dict) -> LLMProvider:
+    if not opts["anthropic_key"]:
+        raise ValueError("ANTHROPIC_API_KEY fehlt.")
+    return AnthropicProvider(opts["anthropic_key"], opts["default_model"])
+
+
+def _make_openai(opts: dict) -> LLMProvider:
+    if not opts["openai_key"]:
+        raise ValueError("OPENAI_API_KEY fehlt.")
+    return OpenAIProvider(opts["openai_key"], opts["default_model"])
+
+
+def _make_gemini(opts: dict) -> LLMProvider:
+    if not opts["gemini_key"]:
+        raise ValueError("GEMINI_API_KEY fehlt.")
+    return GeminiProvider(opts["gemini_key"], opts["default_model"])
+
+
+def _make_cmd(opts: dict) -> LLMProvider:
+    if not opts["provider_cmd"]:
+        raise ValueError("BM_PROVIDER_CMD fehlt für lokalen/headless Provider.")
+    return CommandProvider(opts["provider_cmd"], timeout_sec=opts["provider_timeout_sec"], persistent=opts["provider_cmd_persistent"])
+
+
+def _make_claude_cli(opts: dict) -> LLMProvider:
+    # One provider (CLI process + --session-id conversation) per agent; never shared
+    return ClaudeCLIStreamProvider(claude_bin=opts["claude_cli_bin"] or "claude", mcp_config_path=opts["mcp_config_path"], cwd=opts["cwd"], instructions=opts["instructions"])
+
+
+# Provider name/alias -> builder, resolved with one dict lookup per spawn
+_PROVIDER_BUILDERS = {
+    "anthropic": _make_anthropic,
+    "claude": _make_anthropic,
+    "openai": _make_openai,
+    "oai": _make_openai,
+    "gemini": _make_gemini,
+    "google": _make_gemini,
+    "cmd": _make_cmd,
+    "local": _make_cmd,
+    "claude-code": _make_cmd,
+    "cursor": _make_cmd,
+    "claude-cli": _make_claude_cli,
+    "claude-flow": _make_claude_cli,
+}
+
+
+def make_provider(name: str, anthropic_key: Optional[str], openai_key: Optional[str], gemini_key: Optional[str], default_model: Optional[str] = None, provider_cmd: Optional[str] = None, provider_timeout_sec: int = 90, *, provider_cmd_persistent: bool = False, claude_cli_bin: Optional[str] = None, mcp_config_path: Optional[str] = None, cwd: Optional[str] = None, instructions: Optional[str] = None, cache: bool = False) -> LLMProvider:
+    build = _PROVIDER_BUILDERS.get(name.strip().lower())
+    if build is None:
+        raise ValueError(f"Unbekannter Provider: {name}")
+    provider = build({
+        "anthropic_key": anthropic_key,
+        "openai_key": openai_key,
+        "gemini_key": gemini_key,
+        "default_model": default_model,
+        "provider_cmd": provider_cmd,
+        "provider_timeout_sec": provider_timeout_sec,
+        "provider_cmd_persistent": provider_cmd_persistent,
+        "claude_cli_bin": claude_cli_bin,
+        "mcp_config_path": mcp_config_path,
+        "cwd": cwd,
+        "instructions": instructions,
+    })
+    # Stateful CLI session: every turn must reach the process, so never cached
+    if cache and not isinstance(provider, ClaudeCLIStreamProvider):
+        provider = CachingLLMProvider(provider)
+    return provider
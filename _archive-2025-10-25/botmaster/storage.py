@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+import orjson
 
 
 # Minimal storage layer using sqlite3; schema supports migrating to MariaDB later.
 
+# Rows fetched per query by iter_messages
+MESSAGES_PAGE_SIZE = 500
+
 
 @dataclass
 class Message:
@@ -31,18 +36,29 @@ class Storage:
         self.db_path = Path(db_url.removeprefix("sqlite:///"))
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock = threading.RLock()
+        # One long-lived connection shared by all threads; self._lock serializes access
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
         self._init()
 
-    def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        return conn
+    @contextmanager
+    def _tx(self):
+        # Connection context manager: commit on success, rollback on error
+        with self._lock, self._db:
+            yield self._db
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
 
     def _init(self) -> None:
-        with self._conn() as c:
+        with self._tx() as c:
             c.executescript(
                 """
                 PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-65536;
                 CREATE TABLE IF NOT EXISTS agents (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL,
@@ -75,13 +91,16 @@ class Storage:
                     created_at TEXT NOT NULL,
                     FOREIGN KEY(agent_id) REFERENCES agents(id)
                 );
+                CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+                CREATE INDEX IF NOT EXISTS idx_sessions_agent ON sessions(agent_id, id);
+                CREATE INDEX IF NOT EXISTS idx_events_agent ON events(agent_id, id);
                 """
             )
 
     # Agents
     def create_agent(self, name: str, provider: str, model: str | None, project_path: str | None) -> int:
         now = datetime.utcnow().isoformat()
-        with self._conn() as c:
+        with self._tx() as c:
             cur = c.execute(
                 "INSERT INTO agents(name, provider, model, project_path, status, created_at) VALUES(?,?,?,?,?,?)",
                 (name, provider, model, project_path, "running", now),
@@ -89,18 +108,18 @@ class Storage:
             return int(cur.lastrowid)
 
     def update_agent_status(self, agent_id: int, status: str) -> None:
-        with self._conn() as c:
+        with self._tx() as c:
             c.execute("UPDATE agents SET status=? WHERE id=?", (status, agent_id))
 
     def list_agents(self) -> list[dict[str, Any]]:
-        with self._conn() as c:
-            rows = c.execute("SELECT * FROM agents ORDER BY id DESC").fetchall()
+        with self._tx() as c:
+            rows = c.execute("SELECT id, name, provider, model, project_path, status, created_at FROM agents ORDER BY id DESC").fetchall()
         return [dict(r) for r in rows]
 
     # Sessions
     def create_session(self, agent_id: int, title: str | None = None) -> int:
         now = datetime.utcnow().isoformat()
-        with self._conn() as c:
+        with self._tx() as c:
             cur = c.execute(
                 "INSERT INTO sessions(agent_id, title, created_at) VALUES(?,?,?)",
                 (agent_id, title, now),
@@ -108,37 +127,63 @@ class Storage:
             return int(cur.lastrowid)
 
     def list_sessions(self, agent_id: int) -> list[dict[str, Any]]:
-        with self._conn() as c:
-            rows = c.execute("SELECT * FROM sessions WHERE agent_id=? ORDER BY id DESC", (agent_id,)).fetchall()
+        with self._tx() as c:
+            rows = c.execute("SELECT id, agent_id, title, created_at FROM sessions WHERE agent_id=? ORDER BY id DESC", (agent_id,)).fetchall()
         return [dict(r) for r in rows]
 
     # Messages
     def add_message(self, session_id: int, role: str, content: str) -> int:
         now = datetime.utcnow().isoformat()
-        with self._conn() as c:
+        with self._tx() as c:
             cur = c.execute(
                 "INSERT INTO messages(session_id, role, content, created_at) VALUES(?,?,?,?)",
                 (session_id, role, content, now),
             )
             return int(cur.lastrowid)
 
-    def get_messages(self, session_id: int, limit: int | None = None) -> list[Message]:
-        q = "SELECT * FROM messages WHERE session_id=? ORDER BY id ASC"
+    def add_messages(self, session_id: int, items: list[tuple[str, str]]) -> None:
+        now = datetime.utcnow().isoformat()
+        with self._tx() as c:
+            c.executemany(
+                "INSERT INTO messages(session_id, role, content, created_at) VALUES(?,?,?,?)",
+                [(session_id, role, content, now) for role, content in items],
+            )
+
+    def get_messages(self, session_id: int, limit: int | None = None, after_id: int = 0) -> list[Message]:
+        q = "SELECT id, session_id, role, content, created_at FROM messages WHERE session_id=? AND id>? ORDER BY id ASC"
         if limit:
             q += " LIMIT ?"
-            params = (session_id, limit)
+            params = (session_id, after_id, limit)
         else:
-            params = (session_id,)
-        with self._conn() as c:
+            params = (session_id, after_id)
+        with self._tx() as c:
             rows = c.execute(q, params).fetchall()
-        return [Message(id=r["id"], session_id=r["session_id"], role=r["role"], content=r["content"], created_at=r["created_at"]) for r in rows]
+        # Columns are selected in field order
+        return [Message(*r) for r in rows]
+
+    def iter_messages(self, session_id: int, page_size: int = MESSAGES_PAGE_SIZE) -> Iterator[Message]:
+        """Yield a session's messages page by page (keyset on id), holding one page at a time."""
+        after_id = 0
+        while True:
+            page = self.get_messages(session_id, limit=page_size, after_id=after_id)
+            yield from page
+            if len(page) < page_size:
+                return
+            after_id = page[-1].id
 
     # Events / logging
     def log_event(self, agent_id: int, kind: str, payload: dict[str, Any]) -> None:
         now = datetime.utcnow().isoformat()
-        with self._conn() as c:
+        with self._tx() as c:
             c.execute(
                 "INSERT INTO events(agent_id, kind, payload, created_at) VALUES(?,?,?,?)",
-                (agent_id, kind, json.dumps(payload, ensure_ascii=False), now),
+                (agent_id, kind, orjson.dumps(payload).decode(), now),
             )
 
+    def log_events(self, agent_id: int, items: list[tuple[str, dict[str, Any]]]) -> None:
+        now = datetime.utcnow().isoformat()
+        with self._tx() as c:
+            c.executemany(
+                "INSERT INTO events(agent_id, kind, payload, created_at) VALUES(?,?,?,?)",
+                [(agent_id, kind, orjson.dumps(payload).decode(), now) for kind, payload in items],
+            )
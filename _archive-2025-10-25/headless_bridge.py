@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
-import sys, json
+import sys
+
+import orjson
 
 def main():
     try:
-        data = json.loads(sys.stdin.read() or '{}')
+        data = orjson.loads(sys.stdin.buffer.read() or b'{}')
     except Exception as e:
-        print(json.dumps({"text": f"[bridge] invalid input: {e}"}), end="")
+        sys.stdout.buffer.write(orjson.dumps({"text": f"[bridge] invalid input: {e}"}))
         return
 
     messages = data.get("messages") or []
@@ -21,8 +23,7 @@ def main():
         f"User: {user_text or '(empty)'}\n"
         "(Replace headless_bridge.py with your MCP/Claude-Code client and keep the stdin/stdout JSON contract.)"
     )
-    print(json.dumps({"text": reply}), end="")
+    sys.stdout.buffer.write(orjson.dumps({"text": reply}))
 
 if __name__ == "__main__":
     main()
-
@@ -1,14 +1,18 @@
+import shutil
 import subprocess
-import json
-import time
+import threading
 import uuid
 import sys
 from pathlib import Path
 
+import orjson
+
 
 PROJECT_PATH = Path(r"C:\myFolder\Port\projects\privat\2025-09-agent-taskmanagement")
 MCP_CONFIG = PROJECT_PATH / "mcp-server-life-db" / "mcp-config.json"
 INSTRUCTIONS = PROJECT_PATH / "agent-instructions" / "task-agent-v2.md"
+# Seconds to wait for the first assistant message
+TIMEOUT = 20
 
 
 def main():
@@ -28,7 +32,8 @@ def main():
         "session_id": session_id,
     }
     cmd = [
-        "claude",
+        # Resolved path instead of shell=True (claude is a .cmd shim on Windows)
+        shutil.which("claude") or "claude",
         "-p",
         "--output-format",
         "stream-json",
@@ -45,47 +50,49 @@ def main():
 
     print("==> Starte:", " ".join(cmd))
     proc = subprocess.Popen(
-        " ".join(cmd),
+        cmd,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         cwd=PROJECT_PATH,
-        shell=True,
     )
+    # Drain stderr concurrently: --verbose output could otherwise fill the pipe and stall stdout
+    stderr_chunks: list[bytes] = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    stderr_reader.start()
 
     try:
-        proc.stdin.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        proc.stdin.write(orjson.dumps(payload) + b"\n")
         proc.stdin.flush()
     except Exception as exc:
         print("Fehler beim Schreiben auf stdin:", exc)
 
-    start = time.time()
+    # The budget is enforced by killing the process; the blocking readline then hits EOF
+    timer = threading.Timer(TIMEOUT, proc.kill)
+    timer.start()
     print("==> Warte auf Antwort…")
     try:
-        while time.time() - start < 20:
-            line = proc.stdout.readline()
-            if not line:
-                time.sleep(0.2)
-                continue
-            line = line.decode("utf-8", errors="ignore").strip()
+        for line in proc.stdout:
+            line = line.strip()
             if not line:
                 continue
             try:
-                msg = json.loads(line)
-            except json.JSONDecodeError:
-                print("[stdout]", line)
+                msg = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                print("[stdout]", line.decode("utf-8", errors="ignore"))
                 continue
             print("[json]", msg)
             if msg.get("type") == "assistant" or msg.get("message", {}).get("role") == "assistant":
                 break
     finally:
-        time.sleep(1)
+        timer.cancel()
         proc.terminate()
         try:
             proc.wait(timeout=5)
         except subprocess.TimeoutExpired:
             proc.kill()
-    stderr = proc.stderr.read().decode("utf-8", errors="ignore")
+    stderr_reader.join(timeout=5)
+    stderr = b"".join(stderr_chunks).decode("utf-8", errors="ignore")
     if stderr:
         print("==> stderr:")
         print(stderr)
@@ -1,9 +1,17 @@
 """Agent spawner for botMaster v2.0 - spawn and manage CLI agents"""
+import functools
+import os
+import select
+import selectors
+import signal
 import subprocess
 import threading
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Literal
+from itertools import chain, islice
+from typing import Callable, Literal
 import logging
 
 from .mariadb_storage import MariaDBStorage
@@ -12,6 +20,18 @@ logger = logging.getLogger(__name__)
 
 AgentTool = Literal["claude-flow", "gemini", "cursor-agent", "nested-claude"]
 
+# Lines of agent output kept in memory per session; older lines are spilled to storage
+OUTPUT_BUFFER_LINES = 10000
+
+# Bytes per os.read() from an agent's stdout pipe
+OUTPUT_READ_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=256)
+def _to_wsl_path(project_path: str) -> str:
+    """Convert a Windows project path to its WSL mount path (cached per project)"""
+    return project_path.replace("C:\\", "/mnt/c/").replace("\\", "/")
+
 
 class AgentSession:
     """Represents a running agent session"""
@@ -23,7 +43,9 @@ class AgentSession:
         process: subprocess.Popen,
         project_path: str | None = None,
         project_name: str | None = None,
-        task: str | None = None
+        task: str | None = None,
+        on_spill: Callable[["AgentSession"], None] | None = None,
+        on_finished: Callable[["AgentSession"], None] | None = None
     ):
         self.session_id = session_id
         self.tool_name = tool_name
@@ -31,28 +53,125 @@ class AgentSession:
         self.project_path = project_path
         self.project_name = project_name
         self.task = task
-        self.output_buffer: list[str] = []
+        # Ring buffer: constant memory per session no matter how long the agent runs
+        self.output_buffer: deque[str] = deque(maxlen=OUTPUT_BUFFER_LINES)
         self._output_thread: threading.Thread | None = None
+        self._output_closed = threading.Event()  # set once stdout hit EOF
+        self._pending = b""  # trailing partial line of the last read
+        self._log_prefix = session_id[:8]
+        self._on_spill = on_spill
+        self._buffer_lock = threading.Lock()
+        self._total_lines = 0  # lines ever captured
+        self._persisted_lines = 0  # lines already handed to storage (or to _spilled)
+        self._spilled: list[str] = []  # lines pushed out of the ring, waiting for the storage writer
+        self._on_finished = on_finished
+        self._open_ends = 2  # process exit and stdout EOF; finished once both have been seen
+        self._final_claimed = False  # set by whoever writes the final status
+
+    def _append_output(self, lines: list[str]) -> None:
+        """Append captured lines; not yet persisted lines about to fall out of the ring are spilled first"""
+        notify = False
+        with self._buffer_lock:
+            overflow = len(self.output_buffer) + len(lines) - OUTPUT_BUFFER_LINES
+            if overflow > 0 and self._on_spill:
+                start = self._total_lines - len(self.output_buffer)  # line number of output_buffer[0]
+                first = max(self._persisted_lines, start)
+                stop = start + overflow
+                if stop > first:
+                    # Only the first spill of a batch notifies; later ones ride along in the same write
+                    notify = not self._spilled
+                    self._spilled.extend(islice(chain(self.output_buffer, lines), first - start, stop - start))
+                    self._persisted_lines = stop
+            self.output_buffer.extend(lines)
+            self._total_lines += len(lines)
+        if notify:
+            try:
+                self._on_spill(self)
+            except Exception as e:
+                logger.error(f"Output spill failed for {self.session_id}: {e}")
+
+    def take_spilled_output(self) -> str:
+        """Return (and forget) the lines that left the ring buffer before being persisted"""
+        with self._buffer_lock:
+            text = ''.join(self._spilled)
+            self._spilled.clear()
+            return text
+
+    def take_new_output(self) -> str:
+        """Return output captured since the last call (for appending to storage)"""
+        with self._buffer_lock:
+            start = self._total_lines - len(self.output_buffer)
+            first = max(self._persisted_lines, start)
+            self._persisted_lines = self._total_lines
+            text = ''.join(chain(self._spilled, islice(self.output_buffer, first - start, None)))
+            self._spilled.clear()
+            return text
+
+    def _feed_output(self, chunk: bytes) -> None:
+        """Buffer a block read from stdout; only complete lines go to the buffer"""
+        pending = self._pending + chunk
+        cut = pending.rfind(b"\n") + 1
+        if not cut:
+            self._pending = pending
+            return
+        text = pending[:cut].decode("utf-8", errors="replace")
+        self._pending = pending[cut:]
+        self._append_output(text.splitlines(keepends=True))
+        # One record per read, not per line
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[%s] %s", self._log_prefix, text[:-1])
+
+    def _close_output(self) -> None:
+        """Flush a trailing partial line once stdout is at EOF"""
+        if self._pending:
+            self._append_output([self._pending.decode("utf-8", errors="replace")])
+            self._pending = b""
+        self._output_closed.set()
+        self._end()
+
+    def _end(self) -> None:
+        """Count down process exit / stdout EOF; the later of the two reports the session finished"""
+        with self._buffer_lock:
+            self._open_ends -= 1
+            finished = self._open_ends == 0
+        if finished and self._on_finished:
+            self._on_finished(self)
+
+    def claim_final_status(self) -> bool:
+        """True for exactly one caller: the one that records the final status"""
+        with self._buffer_lock:
+            claimed, self._final_claimed = self._final_claimed, True
+            return not claimed
+
+    def wait_output_closed(self, timeout: float | None = None) -> bool:
+        """Wait until all stdout has been captured"""
+        return self._output_closed.wait(timeout)
 
     def start_output_capture(self):
-        """Start capturing stdout/stderr in background thread"""
+        """Start capturing stdout/stderr in a dedicated background thread"""
         def capture():
             try:
                 if self.process.stdout:
-                    for line in iter(self.process.stdout.readline, ''):
-                        if not line:
+                    # Block reads straight from the pipe fd
+                    fd = self.process.stdout.fileno()
+                    while True:
+                        chunk = os.read(fd, OUTPUT_READ_SIZE)
+                        if not chunk:
                             break
-                        self.output_buffer.append(line)
-                        logger.debug(f"[{self.session_id[:8]}] {line.rstrip()}")
+                        self._feed_output(chunk)
             except Exception as e:
                 logger.error(f"Output capture error for {self.session_id}: {e}")
+            finally:
+                self._close_output()
 
         self._output_thread = threading.Thread(target=capture, daemon=True)
         self._output_thread.start()
 
     def get_output(self, max_lines: int = 100) -> str:
-        """Get recent output from buffer"""
-        return ''.join(self.output_buffer[-max_lines:])
+        """Get recent output from buffer (at most OUTPUT_BUFFER_LINES lines are retained)"""
+        with self._buffer_lock:
+            skip = max(0, len(self.output_buffer) - max_lines)
+            return ''.join(islice(self.output_buffer, skip, None))
 
     def is_running(self) -> bool:
         """Check if process is still running"""
@@ -72,12 +191,27 @@ class AgentSession:
         """Terminate the process gracefully"""
         if self.is_running():
             logger.info(f"Terminating session {self.session_id}")
-            self.process.terminate()
+            self._signal(signal.SIGTERM)
             try:
                 self.process.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 logger.warning(f"Process {self.session_id} didn't terminate, killing...")
-                self.process.kill()
+                self._signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    def _signal(self, sig: int) -> None:
+        """Signal the agent's process group (POSIX) or just the process (Windows)"""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, sig)
+                return
+            except ProcessLookupError:
+                return
+            except OSError:
+                pass
+        if sig == signal.SIGTERM:
+            self.process.terminate()
+        else:
+            self.process.kill()
 
 
 class AgentSpawner:
@@ -98,7 +232,149 @@ class AgentSpawner:
             "cursor-agent": cursor_agent_bin,
             "nested-claude": claude_cli_bin
         }
+        # Shared by the caller, reaper and reader threads without a lock: only single-key
+        # operations are used and iteration goes over a list() snapshot. Finished sessions stay
+        # until cleanup_finished_sessions(); claim_final_status() picks the one final writer
         self.active_sessions: dict[str, AgentSession] = {}
+        # Every session write runs here, in submission order: the reader and reaper threads never
+        # wait on the database, and output chunks reach agent_session_logs in sequence
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-writer")
+        # Exit notifications: pidfd (epoll) or pid (kqueue) -> session_id
+        self._exit_watch: dict[int, str] = {}
+        self._epoll = None
+        self._kqueue = None
+        self._reaper_thread: threading.Thread | None = None
+        self._start_reaper()
+        # One reader thread multiplexes every agent's stdout; Windows pipes can't be selected,
+        # there each session gets its own capture thread instead
+        self._selector: selectors.BaseSelector | None = None
+        self._reader_thread: threading.Thread | None = None
+        if os.name != "nt":
+            self._selector = selectors.DefaultSelector()
+            # Self-pipe so select() picks up pipes registered after it started waiting
+            self._wake_r, self._wake_w = os.pipe()
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+            self._reader_thread = threading.Thread(target=self._read_outputs, daemon=True)
+            self._reader_thread.start()
+
+    def _start_reaper(self) -> None:
+        """Start the exit watcher thread (pidfd + epoll on Linux, kqueue on BSD/macOS)"""
+        if hasattr(os, "pidfd_open") and hasattr(select, "epoll"):
+            self._epoll = select.epoll()
+            target = self._reap_epoll
+        elif hasattr(select, "kqueue"):
+            self._kqueue = select.kqueue()
+            target = self._reap_kqueue
+        else:
+            # No exit events on this platform: cleanup_finished_sessions() polls instead
+            return
+        self._reaper_thread = threading.Thread(target=target, daemon=True)
+        self._reaper_thread.start()
+
+    def _watch_exit(self, session_id: str, pid: int) -> None:
+        """Register a spawned process with the reaper thread"""
+        try:
+            if self._epoll:
+                fd = os.pidfd_open(pid)
+                self._exit_watch[fd] = session_id
+                self._epoll.register(fd, select.EPOLLIN)
+            elif self._kqueue:
+                self._exit_watch[pid] = session_id
+                self._kqueue.control([select.kevent(
+                    pid,
+                    filter=select.KQ_FILTER_PROC,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                    fflags=select.KQ_NOTE_EXIT
+                )], 0)
+        except ProcessLookupError:
+            # Already gone before we could watch it
+            if self._kqueue:
+                self._exit_watch.pop(pid, None)
+            self._reap(session_id)
+        except OSError as e:
+            # e.g. kernel without pidfd_open; the session is left to cleanup_finished_sessions()
+            logger.debug(f"Exit watch unavailable for {session_id}: {e}")
+
+    def _reap_epoll(self) -> None:
+        """Reaper loop: blocks until a watched pidfd becomes readable (process exited)"""
+        while True:
+            for fd, _ in self._epoll.poll():
+                self._epoll.unregister(fd)
+                os.close(fd)
+                self._reap(self._exit_watch.pop(fd))
+
+    def _reap_kqueue(self) -> None:
+        """Reaper loop: blocks until kqueue reports NOTE_EXIT for a watched pid"""
+        while True:
+            for event in self._kqueue.control(None, 16):
+                session_id = self._exit_watch.pop(event.ident, None)
+                if session_id:
+                    self._reap(session_id)
+
+    def _reap(self, session_id: str) -> None:
+        """Collect an exited process; the final status follows once its output is drained too"""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            return  # Already removed by terminate_session/cleanup_finished_sessions
+        try:
+            session.process.wait()
+            session._end()
+        except Exception as e:
+            logger.error(f"Failed to record exit of {session_id}: {e}")
+
+    def _session_finished(self, session: AgentSession) -> None:
+        """on_finished callback (reaper or reader thread): queue the final status write"""
+        logger.info(f"Session finished: {session.session_id} (exit code {session.process.returncode})")
+        if session.claim_final_status():
+            self._writer.submit(self._record_exit, session)
+
+    def _record_exit(self, session: AgentSession) -> None:
+        """Writer: store the final status of a session the reaper picked up"""
+        try:
+            self._write_status(session)
+        except Exception as e:
+            logger.error(f"Failed to record exit of {session.session_id}: {e}")
+
+    def _queue_spill(self, session: AgentSession) -> None:
+        """on_spill callback: runs on the reader thread, so only hand the write to the writer"""
+        self._writer.submit(self._persist_spill, session)
+
+    def _persist_spill(self, session: AgentSession) -> None:
+        """Writer: append everything spilled since the last write as one log chunk"""
+        try:
+            output = session.take_spilled_output()
+            if output:
+                self.storage.update_session(session_id=session.session_id, output_log=output)
+        except Exception as e:
+            logger.error(f"Output spill failed for {session.session_id}: {e}")
+
+    def _capture_output(self, session: AgentSession) -> None:
+        """Hand the session's stdout to the shared reader thread"""
+        if self._selector is None or not session.process.stdout:
+            session.start_output_capture()
+            return
+        self._selector.register(session.process.stdout.fileno(), selectors.EVENT_READ, session)
+        os.write(self._wake_w, b"\0")
+
+    def _read_outputs(self) -> None:
+        """Reader loop: blocks until any registered agent pipe has data or hits EOF"""
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    os.read(self._wake_r, 4096)  # wake-up only, new pipe registered
+                    continue
+                session: AgentSession = key.data
+                try:
+                    chunk = os.read(key.fd, OUTPUT_READ_SIZE)
+                    if chunk:
+                        session._feed_output(chunk)
+                        continue
+                except Exception as e:
+                    logger.error(f"Output capture error for {session.session_id}: {e}")
+                # EOF (or a broken pipe): stop watching and flush the last partial line
+                self._selector.unregister(key.fd)
+                session.process.stdout.close()
+                session._close_output()
 
     def spawn_agent(
         self,
@@ -127,17 +403,21 @@ class AgentSpawner:
         cmd = self._build_command(tool_name, task, project_path, auto_approve)
 
         logger.info(f"Spawning {tool_name} for task: {task[:60]}...")
-        logger.debug(f"Command: {' '.join(cmd)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Command: %s", ' '.join(cmd))
 
+        process = None
         try:
             # Spawn process
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,  # Line buffered
-                cwd=project_path
+                bufsize=-1,  # Block buffered; output is read in chunks from the raw fd
+                cwd=project_path,
+                # Own process group so terminate() can signal the agent's children too.
+                # Our own fds (pidfd/epoll, DB sockets) are non-inheritable, so close_fds has little to walk.
+                start_new_session=True
             )
 
             # Create session
@@ -147,16 +427,13 @@ class AgentSpawner:
                 process=process,
                 project_path=project_path,
                 project_name=project_name,
-                task=task
+                task=task,
+                on_spill=self._queue_spill,
+                on_finished=self._session_finished
             )
 
-            # Start output capture
-            session.start_output_capture()
-
-            # Store in active sessions
-            self.active_sessions[session_id] = session
-
-            # Register in database
+            # Register in database first: spilled output goes to agent_session_logs,
+            # which needs the agent_sessions row to exist
             self.storage.create_session(
                 session_id=session_id,
                 tool_name=tool_name,
@@ -166,11 +443,24 @@ class AgentSpawner:
                 current_task=task
             )
 
+            # Store in active sessions
+            self.active_sessions[session_id] = session
+
+            # Start output capture
+            self._capture_output(session)
+
+            # Registered last so an early exit never races the create_session insert
+            self._watch_exit(session_id, process.pid)
+
             logger.info(f"Agent spawned: {session_id} (PID: {process.pid})")
             return session_id
 
         except Exception as e:
             logger.error(f"Failed to spawn {tool_name}: {e}")
+            if process is not None and session_id not in self.active_sessions:
+                # Nobody would read its output or reap it
+                process.kill()
+                process.wait()
             raise
 
     def _build_command(
@@ -193,11 +483,9 @@ class AgentSpawner:
             # Note: gemini doesn't have built-in auto-approve
 
         elif tool_name == "cursor-agent":
-            # cursor-agent via WSL
+            # cursor-agent via WSL; --cd avoids a bash -c layer (and quoting the task)
             if project_path:
-                # Convert Windows path to WSL path
-                wsl_path = project_path.replace("C:\\", "/mnt/c/").replace("\\", "/")
-                cmd = ["wsl", "bash", "-c", f"cd {wsl_path} && cursor-agent chat '{task}'"]
+                cmd = ["wsl", "--cd", _to_wsl_path(project_path), "cursor-agent", "chat", task]
             else:
                 cmd = ["wsl", "cursor-agent", "chat", task]
             if auto_approve:
@@ -212,22 +500,26 @@ class AgentSpawner:
         return cmd
 
     def get_session(self, session_id: str) -> AgentSession | None:
-        """Get active session by ID"""
+        """Get session by ID (finished sessions stay until cleanup_finished_sessions)"""
         return self.active_sessions.get(session_id)
 
     def update_session_status(self, session_id: str) -> None:
         """Update session status in database"""
         session = self.active_sessions.get(session_id)
-        if not session:
-            return
+        # Once the final status is recorded there is nothing left to update
+        if session and not session._final_claimed:
+            self._writer.submit(self._write_status, session).result()
 
-        status = session.get_status()
-        output = session.get_output(max_lines=1000)
+    def _write_status(self, session: AgentSession, status: str | None = None) -> None:
+        """Writer: store the session's status and the output storage hasn't seen yet"""
+        status = status or session.get_status()
+        # output_log is appended to in storage, so only send what it hasn't seen yet
+        output = session.take_new_output()
 
         self.storage.update_session(
-            session_id=session_id,
+            session_id=session.session_id,
             status=status,
-            output_log=output,
+            output_log=output or None,
             exit_code=session.process.returncode
         )
 
@@ -237,32 +529,43 @@ class AgentSpawner:
 
     def terminate_session(self, session_id: str) -> None:
         """Terminate a running session"""
-        session = self.active_sessions.get(session_id)
+        session = self.active_sessions.pop(session_id, None)
         if not session:
             logger.warning(f"Session {session_id} not found")
             return
 
+        # Claimed up front so the reaper leaves the final status write to us
+        if not session.claim_final_status():
+            return  # Already finished and recorded
         session.terminate()
 
-        # Update status
-        self.storage.update_session(
-            session_id=session_id,
-            status="crashed" if session.process.returncode != 0 else "completed",
-            exit_code=session.process.returncode,
-            output_log=session.get_output()
-        )
-
-        # Remove from active sessions
-        del self.active_sessions[session_id]
+        # Update status (on the writer, behind any spill still queued for this session)
+        status = "crashed" if session.process.returncode != 0 else "completed"
+        self._writer.submit(self._write_status, session, status).result()
 
     def cleanup_finished_sessions(self) -> None:
-        """Remove finished sessions from active list"""
+        """Remove finished sessions from active list, recording any the reaper hasn't (e.g. no exit events)"""
+        # Sessions whose output is still draining are left for the next round
         finished = [
-            sid for sid, session in self.active_sessions.items()
-            if not session.is_running()
+            sid for sid, session in list(self.active_sessions.items())
+            if not session.is_running() and session.wait_output_closed(timeout=0)
         ]
 
+        sessions = []
         for sid in finished:
+            session = self.active_sessions.pop(sid, None)
+            if not session:
+                continue
             logger.info(f"Cleaning up finished session: {sid}")
-            self.update_session_status(sid)
-            del self.active_sessions[sid]
+            if session.claim_final_status():
+                sessions.append(session)
+
+        if sessions:
+            self._writer.submit(self._write_statuses, sessions).result()
+
+    def _write_statuses(self, sessions: list[AgentSession]) -> None:
+        """Writer: finalize a cleanup wave in one transaction"""
+        self.storage.batch_update_sessions([
+            (session.get_status(), session.take_new_output() or None, session.process.returncode, session.session_id)
+            for session in sessions
+        ])
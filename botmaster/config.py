@@ -4,10 +4,14 @@ from dataclasses import dataclass
 from pathlib import Path
 
 
+# Env values read as true by _bool
+_TRUTHY = frozenset({"1", "true", "yes", "y", "on"})
+
+
 def _bool(val: str | None, default: bool = False) -> bool:
     if val is None:
         return default
-    return val.strip().lower() in {"1", "true", "yes", "y", "on"}
+    return val.strip().lower() in _TRUTHY
 
 
 @dataclass
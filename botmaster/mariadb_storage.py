@@ -1,13 +1,74 @@
 """MariaDB storage client for botMaster v2.0 orchestration state"""
-import pymysql
+try:
+    # mysqlclient: C driver, decodes rows in C
+    import MySQLdb as db_driver
+    from MySQLdb.cursors import DictCursor
+except ImportError:
+    # Pure-Python fallback
+    import pymysql as db_driver
+    from pymysql.cursors import DictCursor
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Iterator
-import json
+from typing import Any, Callable, Iterator
+import functools
+import orjson
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Pooled connections idle for longer than this (seconds) are pinged before reuse
+POOL_PING_INTERVAL = 30.0
+# Results of get_session/list_active_sessions/get_decisions are reused this long (seconds);
+# writes through this client invalidate them right away
+READ_CACHE_TTL = 1.0
+READ_CACHE_SIZE = 512
+
+# Explicit column lists; session output lives in agent_session_logs and is only fetched when asked for
+SESSION_COLUMNS = (
+    "session_id, tool_name, project_path, project_name, status, pid, started_at, "
+    "last_activity, completed_at, current_task, exit_code, error_message"
+)
+ACTIVE_SESSION_COLUMNS = "session_id, tool_name, project_name, current_task, uptime_seconds, last_activity"
+# Pending messages have no response/processed_at yet
+PENDING_MESSAGE_COLUMNS = "id, from_agent, to_agent, message_type, message, context_data, timestamp, status"
+DECISION_COLUMNS = (
+    "id, project, decision_type, decision, reasoning, alternatives_considered, outcome, "
+    "timestamp, markus_feedback, feedback_timestamp"
+)
+
+# Every value is a placeholder (status/outcome included): PyMySQL only rewrites executemany
+# into one multi-row INSERT when the VALUES tuple holds nothing but %s
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO agent_messages (from_agent, to_agent, message_type, message, context_data, status) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+INSERT_DECISION_SQL = (
+    "INSERT INTO orchestration_decisions "
+    "(project, decision_type, decision, reasoning, alternatives_considered, outcome) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+# Statuses that end a session and stamp completed_at
+TERMINAL_STATUSES = ("completed", "failed", "crashed")
+# SET clauses of update_session, in bit order of its column mask
+_SESSION_UPDATE_FIELDS = (
+    "status = %s",
+    "completed_at = NOW()",
+    "current_task = %s",
+    "last_activity = NOW()",
+    "error_message = %s",
+    "exit_code = %s",
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _update_session_sql(mask: int) -> str:
+    """UPDATE statement for the _SESSION_UPDATE_FIELDS whose bit is set in mask (built once per mask)"""
+    sets = ", ".join(field for i, field in enumerate(_SESSION_UPDATE_FIELDS) if mask >> i & 1)
+    return f"UPDATE agent_sessions SET {sets} WHERE session_id = %s"
+
 
 class MariaDBStorage:
     """MariaDB client for orchestration state tracking with connection pooling"""
@@ -28,52 +89,103 @@ class MariaDBStorage:
             "password": password,
             "database": database,
             "charset": "utf8mb4",
-            "cursorclass": pymysql.cursors.DictCursor,
-            "autocommit": False,
+            "cursorclass": DictCursor,
         }
         self.pool_size = pool_size
-        self._connections: list[pymysql.Connection] = []
+        # Idle connections with their last-use time, per autocommit mode;
+        # shared by the daemon, reaper and capture threads
+        self._connections: dict[bool, list[tuple[Any, float]]] = {False: [], True: []}
+        self._pool_lock = threading.Lock()
+        # (kind, *args) -> (expires_at, rows); _read_gen discards reads that raced a write
+        self._read_cache: dict[tuple, tuple[float, Any]] = {}
+        self._read_gen = 0
+        self._cache_lock = threading.Lock()
 
     @contextmanager
-    def get_connection(self) -> Iterator[pymysql.Connection]:
-        """Get a connection from the pool (or create new one)"""
+    def get_connection(self, autocommit: bool = False) -> Iterator[Any]:
+        """
+        Get a connection from the pool (or create new one)
+
+        Args:
+            autocommit: for single statements; saves the COMMIT round-trip.
+                Multi-statement writes keep the default transactional connection.
+        """
+        pool = self._connections[autocommit]
         conn = None
         try:
             # Try to reuse existing connection
-            if self._connections:
-                conn = self._connections.pop()
-                # Test if connection is still alive
+            with self._pool_lock:
+                if pool:
+                    conn, last_used = pool.pop()
+            # Only pay the ping round-trip for connections that sat idle a while
+            if conn is not None and time.monotonic() - last_used > POOL_PING_INTERVAL:
                 try:
-                    conn.ping(reconnect=True)
+                    # mysqlclient raises on a dead connection, which is then replaced below;
+                    # pymysql's ping() reconnects in place and only raises if that fails too
+                    conn.ping()
                 except Exception:
+                    self._close_quietly(conn)
                     conn = None
 
             # Create new connection if needed
             if conn is None:
-                conn = pymysql.connect(**self.config)
+                conn = db_driver.connect(**self.config, autocommit=autocommit)
 
             yield conn
-            conn.commit()
-
-            # Return to pool if not full
-            if len(self._connections) < self.pool_size:
-                self._connections.append(conn)
-            else:
-                conn.close()
+            if not autocommit:
+                conn.commit()
 
         except Exception as e:
+            if conn and not autocommit:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
             if conn:
-                conn.rollback()
+                # Connection state is unknown after an error, don't hand it out again
+                self._close_quietly(conn)
             logger.error(f"Database error: {e}")
             raise
 
-        finally:
-            # If error occurred and conn not in pool, close it
-            if conn and conn not in self._connections:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+        # Return to pool if not full
+        with self._pool_lock:
+            if len(pool) < self.pool_size:
+                pool.append((conn, time.monotonic()))
+                return
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _cached_read(self, key: tuple, load: Callable[[], Any]) -> Any:
+        """Serve a recent result for key, or run load() and remember it for READ_CACHE_TTL"""
+        now = time.monotonic()
+        with self._cache_lock:
+            hit = self._read_cache.get(key)
+            gen = self._read_gen
+        if hit is not None and hit[0] > now:
+            value = hit[1]
+        else:
+            value = load()
+            with self._cache_lock:
+                if gen == self._read_gen:
+                    if len(self._read_cache) >= READ_CACHE_SIZE:
+                        self._read_cache = {k: v for k, v in self._read_cache.items() if v[0] > now}
+                    self._read_cache[key] = (now + READ_CACHE_TTL, value)
+        # Hand out copies so callers can't modify the cached rows
+        if isinstance(value, (list, tuple)):
+            return [dict(row) for row in value]
+        return dict(value) if value is not None else None
+
+    def _invalidate(self, *kinds: str) -> None:
+        """Drop cached reads of the given kinds after a write"""
+        with self._cache_lock:
+            self._read_gen += 1
+            self._read_cache = {k: v for k, v in self._read_cache.items() if k[0] not in kinds}
 
     # ========== Agent Sessions ==========
 
@@ -87,7 +199,7 @@ class MariaDBStorage:
         current_task: str | None = None,
     ) -> None:
         """Register a new agent session"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -98,6 +210,7 @@ class MariaDBStorage:
                 (session_id, tool_name, project_path, project_name, pid, current_task)
             )
             logger.info(f"Created session {session_id} for {tool_name}")
+        self._invalidate("session", "active_sessions")
 
     def update_session(
         self,
@@ -109,60 +222,109 @@ class MariaDBStorage:
         exit_code: int | None = None,
     ) -> None:
         """Update an existing agent session"""
-        updates = []
-        params = []
-
-        if status:
-            updates.append("status = %s")
-            params.append(status)
-            if status in ("completed", "failed", "crashed"):
-                updates.append("completed_at = NOW()")
-
-        if current_task is not None:
-            updates.append("current_task = %s")
-            params.append(current_task)
-
-        if output_log is not None:
-            updates.append("output_log = CONCAT(COALESCE(output_log, ''), %s)")
-            params.append(output_log)
-
-        if error_message is not None:
-            updates.append("error_message = %s")
-            params.append(error_message)
-
-        if exit_code is not None:
-            updates.append("exit_code = %s")
-            params.append(exit_code)
-
-        if not updates:
+        # Which columns to set, as a bit mask over _SESSION_UPDATE_FIELDS
+        mask = (
+            bool(status)
+            | (status in TERMINAL_STATUSES) << 1
+            | (current_task is not None) << 2
+            # The chunk itself goes to agent_session_logs; the session row only records activity
+            | (output_log is not None) << 3
+            | (error_message is not None) << 4
+            | (exit_code is not None) << 5
+        )
+        if not mask:
             return
 
+        params = [v for v in (status or None, current_task, error_message, exit_code) if v is not None]
         params.append(session_id)
 
-        with self.get_connection() as conn:
+        # A log chunk is a second statement (INSERT below), so only then use a transaction
+        with self.get_connection(autocommit=not output_log) as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                f"UPDATE agent_sessions SET {', '.join(updates)} WHERE session_id = %s",
-                params
-            )
+            cursor.execute(_update_session_sql(mask), params)
+            if output_log:
+                cursor.execute(
+                    "INSERT INTO agent_session_logs (session_id, chunk) VALUES (%s, %s)",
+                    (session_id, output_log)
+                )
             logger.debug(f"Updated session {session_id}")
+        self._invalidate("session", "active_sessions")
+
+    def batch_update_sessions(self, rows: list[tuple[str, str | None, int | None, str]]) -> None:
+        """
+        Finalize several sessions in one transaction
+
+        Args:
+            rows: (status, output_log, exit_code, session_id) per session;
+                output_log is appended like in update_session
+        """
+        if not rows:
+            return
 
-    def get_session(self, session_id: str) -> dict[str, Any] | None:
-        """Get details of a specific session"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM agent_sessions WHERE session_id = %s",
-                (session_id,)
+            cursor.executemany(
+                """
+                UPDATE agent_sessions
+                SET status = %s, completed_at = NOW(), exit_code = %s
+                WHERE session_id = %s
+                """,
+                [(status, exit_code, session_id) for status, _, exit_code, session_id in rows]
             )
-            return cursor.fetchone()
+            chunks = [(session_id, output_log) for _, output_log, _, session_id in rows if output_log]
+            if chunks:
+                cursor.executemany(
+                    "INSERT INTO agent_session_logs (session_id, chunk) VALUES (%s, %s)",
+                    chunks
+                )
+            logger.debug(f"Updated {len(rows)} sessions")
+        self._invalidate("session", "active_sessions")
+
+    def get_session(self, session_id: str, include_output_log: bool = False) -> dict[str, Any] | None:
+        """Get details of a specific session (output_log only if include_output_log)"""
+        def load():
+            with self.get_connection(autocommit=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT {SESSION_COLUMNS} FROM agent_sessions WHERE session_id = %s",
+                    (session_id,)
+                )
+                session = cursor.fetchone()
+                if session is not None and include_output_log:
+                    session["output_log"] = self._read_session_log(cursor, session_id)
+                return session
+
+        return self._cached_read(("session", session_id, include_output_log), load)
+
+    def get_session_log(self, session_id: str) -> str:
+        """Full output log of a session"""
+        with self.get_connection(autocommit=True) as conn:
+            return self._read_session_log(conn.cursor(), session_id)
+
+    @staticmethod
+    def _read_session_log(cursor, session_id: str) -> str:
+        # Logs written before agent_session_logs existed are still in agent_sessions.output_log
+        cursor.execute(
+            "SELECT COALESCE(output_log, '') AS output_log FROM agent_sessions WHERE session_id = %s",
+            (session_id,)
+        )
+        row = cursor.fetchone()
+        legacy = row["output_log"] if row else ""
+        cursor.execute(
+            "SELECT chunk FROM agent_session_logs WHERE session_id = %s ORDER BY id",
+            (session_id,)
+        )
+        return legacy + "".join(r["chunk"] for r in cursor.fetchall())
 
     def list_active_sessions(self) -> list[dict[str, Any]]:
         """List all currently active agent sessions"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM active_agents")
-            return cursor.fetchall()
+        def load():
+            with self.get_connection(autocommit=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {ACTIVE_SESSION_COLUMNS} FROM active_agents")
+                return cursor.fetchall()
+
+        return self._cached_read(("active_sessions",), load)
 
     def complete_session(
         self,
@@ -190,33 +352,59 @@ class MariaDBStorage:
         context_data: dict[str, Any] | None = None,
     ) -> int:
         """Send a message from one agent to another"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
-                INSERT INTO agent_messages
-                (from_agent, to_agent, message_type, message, context_data, status)
-                VALUES (%s, %s, %s, %s, %s, 'pending')
-                """,
+                INSERT_MESSAGE_SQL,
                 (
                     from_agent,
                     to_agent,
                     message_type,
                     message,
-                    json.dumps(context_data) if context_data else None
+                    orjson.dumps(context_data).decode() if context_data else None,
+                    "pending"
                 )
             )
             message_id = cursor.lastrowid
             logger.info(f"Message {message_id} sent from {from_agent} to {to_agent}")
             return message_id
 
+    def send_messages_bulk(
+        self,
+        rows: list[tuple[str, str, str, str, dict[str, Any] | None]],
+    ) -> int:
+        """
+        Send several messages in one round-trip and one transaction
+
+        Args:
+            rows: (from_agent, to_agent, message_type, message, context_data) per message
+
+        Returns:
+            Number of messages inserted (PyMySQL may split a large batch into
+            several INSERTs, so the new ids are not derived from lastrowid)
+        """
+        if not rows:
+            return 0
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                INSERT_MESSAGE_SQL,
+                [
+                    (from_agent, to_agent, message_type, message, orjson.dumps(context_data).decode() if context_data else None, "pending")
+                    for from_agent, to_agent, message_type, message, context_data in rows
+                ]
+            )
+            logger.info(f"Sent {len(rows)} messages")
+            return len(rows)
+
     def get_pending_messages(self, to_agent: str) -> list[dict[str, Any]]:
         """Get all pending messages for a specific agent"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT * FROM agent_messages
+                f"""
+                SELECT {PENDING_MESSAGE_COLUMNS} FROM agent_messages
                 WHERE to_agent = %s AND status = 'pending'
                 ORDER BY timestamp ASC
                 """,
@@ -228,7 +416,7 @@ class MariaDBStorage:
             for msg in messages:
                 if msg.get("context_data"):
                     try:
-                        msg["context_data"] = json.loads(msg["context_data"])
+                        msg["context_data"] = orjson.loads(msg["context_data"])
                     except Exception:
                         pass
 
@@ -241,7 +429,7 @@ class MariaDBStorage:
         status: str = "done"
     ) -> None:
         """Mark a message as processed"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -255,7 +443,7 @@ class MariaDBStorage:
 
     def update_message_response(self, message_id: int, response: str) -> None:
         """Update the response for a message"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE agent_messages SET response = %s WHERE id = %s",
@@ -273,25 +461,52 @@ class MariaDBStorage:
         alternatives_considered: list[str] | None = None,
     ) -> int:
         """Log an orchestration decision"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
-                INSERT INTO orchestration_decisions
-                (project, decision_type, decision, reasoning, alternatives_considered, outcome)
-                VALUES (%s, %s, %s, %s, %s, 'pending')
-                """,
+                INSERT_DECISION_SQL,
                 (
                     project,
                     decision_type,
                     decision,
                     reasoning,
-                    json.dumps(alternatives_considered) if alternatives_considered else None
+                    orjson.dumps(alternatives_considered).decode() if alternatives_considered else None,
+                    "pending"
                 )
             )
             decision_id = cursor.lastrowid
             logger.info(f"Logged decision {decision_id} for project {project}")
-            return decision_id
+        self._invalidate("decisions")
+        return decision_id
+
+    def log_decisions_bulk(
+        self,
+        rows: list[tuple[str, str, str, str | None, list[str] | None]],
+    ) -> int:
+        """
+        Log several orchestration decisions in one round-trip and one transaction
+
+        Args:
+            rows: (project, decision_type, decision, reasoning, alternatives_considered) per decision
+
+        Returns:
+            Number of decisions inserted
+        """
+        if not rows:
+            return 0
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                INSERT_DECISION_SQL,
+                [
+                    (project, decision_type, decision, reasoning, orjson.dumps(alternatives).decode() if alternatives else None, "pending")
+                    for project, decision_type, decision, reasoning, alternatives in rows
+                ]
+            )
+            logger.info(f"Logged {len(rows)} decisions")
+        self._invalidate("decisions")
+        return len(rows)
 
     def update_decision_outcome(
         self,
@@ -300,7 +515,7 @@ class MariaDBStorage:
         markus_feedback: str | None = None
     ) -> None:
         """Update the outcome of a decision"""
-        with self.get_connection() as conn:
+        with self.get_connection(autocommit=True) as conn:
             cursor = conn.cursor()
 
             if markus_feedback:
@@ -319,6 +534,7 @@ class MariaDBStorage:
                 )
 
             logger.debug(f"Decision {decision_id} outcome updated to {outcome}")
+        self._invalidate("decisions")
 
     def get_decisions(
         self,
@@ -327,53 +543,56 @@ class MariaDBStorage:
         limit: int = 50
     ) -> list[dict[str, Any]]:
         """Get orchestration decisions with optional filtering"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        def load():
+            with self.get_connection(autocommit=True) as conn:
+                cursor = conn.cursor()
 
-            conditions = []
-            params = []
+                conditions = []
+                params = []
 
-            if project:
-                conditions.append("project = %s")
-                params.append(project)
+                if project:
+                    conditions.append("project = %s")
+                    params.append(project)
 
-            if decision_type:
-                conditions.append("decision_type = %s")
-                params.append(decision_type)
+                if decision_type:
+                    conditions.append("decision_type = %s")
+                    params.append(decision_type)
 
-            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-            params.append(limit)
+                where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                params.append(limit)
 
-            cursor.execute(
-                f"""
-                SELECT * FROM orchestration_decisions
-                {where_clause}
-                ORDER BY timestamp DESC
-                LIMIT %s
-                """,
-                params
-            )
+                cursor.execute(
+                    f"""
+                    SELECT {DECISION_COLUMNS} FROM orchestration_decisions
+                    {where_clause}
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                    """,
+                    params
+                )
 
-            decisions = cursor.fetchall()
+                decisions = cursor.fetchall()
 
-            # Parse JSON alternatives_considered
-            for dec in decisions:
-                if dec.get("alternatives_considered"):
-                    try:
-                        dec["alternatives_considered"] = json.loads(dec["alternatives_considered"])
-                    except Exception:
-                        pass
+                # Parse JSON alternatives_considered
+                for dec in decisions:
+                    if dec.get("alternatives_considered"):
+                        try:
+                            dec["alternatives_considered"] = orjson.loads(dec["alternatives_considered"])
+                        except Exception:
+                            pass
+
+                return decisions
 
-            return decisions
+        return self._cached_read(("decisions", project, decision_type, limit), load)
 
     # ========== Utility ==========
 
     def close_all(self) -> None:
         """Close all pooled connections"""
-        for conn in self._connections:
-            try:
-                conn.close()
-            except Exception:
-                pass
-        self._connections.clear()
+        with self._pool_lock:
+            idle = [entry for pool in self._connections.values() for entry in pool]
+            for pool in self._connections.values():
+                pool.clear()
+        for conn, _ in idle:
+            self._close_quietly(conn)
         logger.info("Closed all database connections")
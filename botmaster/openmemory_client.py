@@ -1,7 +1,10 @@
 """OpenMemory client for botMaster v2.0 semantic memory"""
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Any
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,21 @@ class OpenMemoryClient:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        # Keep-alive pool for all calls; retries only cover idempotent requests (GET)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount(
+            self.base_url,
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20,
+                max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+            )
+        )
+
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
 
     def add_memory(
         self,
@@ -55,10 +73,9 @@ class OpenMemoryClient:
             if metadata:
                 payload["metadata"] = metadata
 
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/v1/memories/",
-                json=payload,
-                headers=self.headers,
+                data=orjson.dumps(payload),
                 timeout=10
             )
 
@@ -67,7 +84,7 @@ class OpenMemoryClient:
                 logger.warning(f"Memory add failed ({response.status_code}): {response.text}")
                 return None
 
-            result = response.json()
+            result = orjson.loads(response.content)
             logger.info(f"Memory added: {result.get('id', 'unknown')}")
             return result
 
@@ -97,10 +114,9 @@ class OpenMemoryClient:
                 "limit": limit
             }
 
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/memories/search/",
                 params=params,
-                headers=self.headers,
                 timeout=10
             )
 
@@ -108,7 +124,7 @@ class OpenMemoryClient:
                 logger.warning(f"Memory search failed ({response.status_code}): {response.text}")
                 return []
 
-            result = response.json()
+            result = orjson.loads(response.content)
             memories = result.get("results", [])
             logger.debug(f"Found {len(memories)} memories for query: {query}")
             return memories
@@ -139,10 +155,9 @@ class OpenMemoryClient:
                 "offset": offset
             }
 
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/memories/",
                 params=params,
-                headers=self.headers,
                 timeout=10
             )
 
@@ -150,7 +165,7 @@ class OpenMemoryClient:
                 logger.warning(f"Get memories failed ({response.status_code}): {response.text}")
                 return []
 
-            result = response.json()
+            result = orjson.loads(response.content)
             memories = result.get("results", [])
             logger.debug(f"Retrieved {len(memories)} memories")
             return memories
@@ -1,5 +1,8 @@
 """botMaster v2.0 Orchestrator - Main coordination logic"""
+import functools
 import logging
+import re
+import time
 from typing import Callable
 from datetime import datetime
 
@@ -11,6 +14,37 @@ from .telegram_client import TelegramClient
 
 logger = logging.getLogger(__name__)
 
+# Memory search results per task are reused this long (seconds)
+CONTEXT_CACHE_TTL = 300.0
+CONTEXT_CACHE_SIZE = 512
+
+# (keywords, agent, reasoning), checked in order; tasks matching none go to nested-claude
+ROUTING_RULES = (
+    (("python", "backend", "api", "database"), "claude-flow",
+     "Python/backend work best suited for claude-flow swarm intelligence"),
+    (("quick", "simple", "check", "what is"), "gemini",
+     "Quick query best handled by fast gemini CLI"),
+    (("cursor", "ide", "editor"), "cursor-agent",
+     "Cursor-specific task"),
+)
+# All rules in one pattern: alternative i is a lookahead for rule i's keywords, matched
+# at position 0, so the first rule with a hit wins exactly as in the ordered loop
+_ROUTER = re.compile(
+    "|".join(f"((?=.*?(?:{'|'.join(map(re.escape, words))})))" for words, _, _ in ROUTING_RULES),
+    re.DOTALL,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _route_by_keywords(task_lower: str) -> tuple[str, str]:
+    """(agent, reasoning) for a lowercased task"""
+    m = _ROUTER.match(task_lower)
+    if m:
+        _, agent, reasoning = ROUTING_RULES[m.lastindex - 1]
+        return agent, reasoning
+    # Default to nested-claude for general tasks
+    return "nested-claude", "General task, using nested claude for analysis"
+
 
 class Orchestrator:
     """
@@ -60,6 +94,9 @@ class Orchestrator:
                 )
             )
 
+        # task -> (expires_at, memories), see _relevant_context
+        self._context_cache: dict[str, tuple[float, list[dict]]] = {}
+
         logger.info("Orchestrator initialized")
 
     def process_request(self, user_input: str) -> str:
@@ -128,37 +165,32 @@ class Orchestrator:
         Returns:
             Dict with 'agent' and 'reasoning'
         """
-        task_lower = task.lower()
+        # Simple rule-based allocation (can be enhanced with LLM later)
+        agent, reasoning = _route_by_keywords(task.lower())
 
-        # Check for relevant context from memory (degraded mode OK)
-        context = self.memory.get_relevant_context(task, limit=3)
-        logger.debug(f"Found {len(context)} relevant memories for task")
+        # The keyword route never needs memory context, so only search when it gets logged
+        if logger.isEnabledFor(logging.DEBUG):
+            context = self._relevant_context(task)
+            logger.debug(f"Found {len(context)} relevant memories for task")
 
-        # Simple rule-based allocation (can be enhanced with LLM later)
-        if any(word in task_lower for word in ["python", "backend", "api", "database"]):
-            return {
-                "agent": "claude-flow",
-                "reasoning": "Python/backend work best suited for claude-flow swarm intelligence"
-            }
-
-        elif any(word in task_lower for word in ["quick", "simple", "check", "what is"]):
-            return {
-                "agent": "gemini",
-                "reasoning": "Quick query best handled by fast gemini CLI"
-            }
-
-        elif any(word in task_lower for word in ["cursor", "ide", "editor"]):
-            return {
-                "agent": "cursor-agent",
-                "reasoning": "Cursor-specific task"
-            }
+        return {"agent": agent, "reasoning": reasoning}
 
-        else:
-            # Default to nested-claude for general tasks
-            return {
-                "agent": "nested-claude",
-                "reasoning": "General task, using nested claude for analysis"
-            }
+    def _relevant_context(self, task: str) -> list[dict]:
+        """Memory search for a task, reused for CONTEXT_CACHE_TTL seconds"""
+        now = time.monotonic()
+        hit = self._context_cache.get(task)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        context = self.memory.get_relevant_context(task, limit=3)
+        if len(self._context_cache) >= CONTEXT_CACHE_SIZE:
+            # Drop expired entries; if all are still live, the oldest one
+            self._context_cache = {k: v for k, v in self._context_cache.items() if v[0] > now}
+            if len(self._context_cache) >= CONTEXT_CACHE_SIZE:
+                del self._context_cache[next(iter(self._context_cache))]
+        # Re-inserted at the end, so dict order stays oldest-first
+        self._context_cache.pop(task, None)
+        self._context_cache[task] = (now + CONTEXT_CACHE_TTL, context)
+        return context
 
     def get_status(self) -> str:
         """Get current orchestrator status"""
@@ -182,8 +214,11 @@ class Orchestrator:
     def cleanup(self):
         """Cleanup resources"""
         logger.info("Cleaning up orchestrator...")
+        if self.telegram:
+            self.telegram.stop()
         self.spawner.cleanup_finished_sessions()
         self.storage.close_all()
+        self.memory.close()
 
     def start_telegram_bot(self):
         """Start Telegram bot for user interaction"""
@@ -200,7 +235,7 @@ class Orchestrator:
             # Handle commands
             if text.startswith("/status"):
                 status = self.get_status()
-                self.telegram.send_message(status)
+                self.telegram.send_message_async(status)
 
             elif text.startswith("/help"):
                 help_text = (
@@ -210,22 +245,22 @@ class Orchestrator:
                     "/help - Show this help\n\n"
                     "Just send your task and I'll orchestrate the right agent!"
                 )
-                self.telegram.send_message(help_text)
+                self.telegram.send_message_async(help_text)
 
             else:
                 # Process as regular request
                 response = self.process_request(text)
-                self.telegram.send_message(response)
+                self.telegram.send_message_async(response)
 
-        def on_callback(data: str, callback_query: dict):
+        def on_callback(data: str, callback_query: dict, ack: Callable[[], None]):
             """Handle callback button presses"""
             logger.info(f"Callback: {data}")
             # Handle callbacks as needed
+            ack()
 
         # Start polling
         self.telegram.send_message("botMaster v2.0 Orchestrator online!")
         self.telegram.start_polling(
             on_message=on_message,
-            on_callback=on_callback,
-            cleanup=self.cleanup
+            on_callback=on_callback
         )
@@ -1,27 +1,69 @@
 from __future__ import annotations
 
-import json
+import hmac
+import os
+import queue
+import random
+import secrets
 import threading
-import time
 from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
 from typing import Callable, Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+# Messages waiting for the background sender; the oldest is dropped when full
+OUTBOX_SIZE = 1024
+# Upper bound (seconds) for the poller's backoff after consecutive failures
+POLL_BACKOFF_MAX = 30.0
+# Keep-alive connections to api.telegram.org: long-poll, sender thread, webhook replies
+HTTP_POOL_SIZE = 4
+# Bodies are encoded with orjson, so the content type is set by hand
+JSON_HEADERS = {"Content-Type": "application/json"}
+# getUpdates body of an idle long-poll, answered without running the JSON parser
+EMPTY_UPDATES = b'{"ok":true,"result":[]}'
 
 
 @dataclass
 class TelegramConfig:
     token: str
     chat_id: str
+    # Shared HTTP session; the client builds its own pooled one when unset
+    session: requests.Session | None = None
 
 
 class TelegramClient:
-    def __init__(self, cfg: TelegramConfig):
+    def __init__(self, cfg: TelegramConfig, offset_path: Path | None = None):
         self.cfg = cfg
         self.base = f"https://api.telegram.org/bot{cfg.token}"
+        # Incoming chat ids are ints; convert once instead of str() on both sides per update
+        try:
+            self._chat_id = int(cfg.chat_id)
+        except (TypeError, ValueError):
+            self._chat_id = cfg.chat_id  # e.g. "@channel": never equal to a numeric id, as before
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._offset = 0
+        # Next update_id survives restarts here, so updates are neither replayed nor lost
+        self._offset_path = offset_path
+        if offset_path:
+            try:
+                self._offset = int(orjson.loads(offset_path.read_bytes()).get("offset", 0))
+            except Exception:
+                pass
+        self._saved_offset = self._offset
+        # One keep-alive session for every API call, so TLS handshakes are amortized
+        self._session = cfg.session
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+        self._outbox: queue.Queue = queue.Queue(maxsize=OUTBOX_SIZE)
+        self._sender: Optional[threading.Thread] = None
+        self._sender_lock = threading.Lock()
+        self._server: Optional[HTTPServer] = None
 
     def send_message(self, text: str, reply_markup: dict | None = None) -> None:
         url = f"{self.base}/sendMessage"
@@ -32,60 +74,174 @@ class TelegramClient:
         }
         if reply_markup is not None:
             payload["reply_markup"] = reply_markup
-        r = requests.post(url, json=payload, timeout=30)
+        r = self._session.post(url, data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=30)
         r.raise_for_status()
 
+    def send_message_async(self, text: str, reply_markup: dict | None = None) -> None:
+        """Queue a message for the sender thread so callers never wait on Telegram"""
+        with self._sender_lock:
+            if not (self._sender and self._sender.is_alive()):
+                self._sender = threading.Thread(target=self._send_loop, name="tg-send", daemon=True)
+                self._sender.start()
+        while True:
+            try:
+                self._outbox.put_nowait((text, reply_markup))
+                return
+            except queue.Full:
+                try:
+                    self._outbox.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _send_loop(self) -> None:
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                return
+            try:
+                self.send_message(*item)
+            except Exception:
+                # same minimal error handling as the poller
+                pass
+
     def start_polling(self, on_message: Callable[[str, dict], None], poll_interval: float = 1.5, on_callback: Optional[Callable[[str, dict, Callable[[], None]], None]] = None) -> None:
         if self._thread and self._thread.is_alive():
             return
 
         def _run():
+            errors = 0
             while not self._stop.is_set():
                 try:
                     updates = self._get_updates()
                     for upd in updates:
                         self._offset = max(self._offset, upd.get("update_id", 0) + 1)
-                        # Handle callback queries (inline keyboard)
-                        if on_callback and upd.get("callback_query"):
-                            cq = upd["callback_query"]
-                            data = cq.get("data", "")
-                            chat_id = cq.get("message", {}).get("chat", {}).get("id")
-                            if str(chat_id) == str(self.cfg.chat_id):
-                                def ack():
-                                    try:
-                                        self._answer_callback_query(cq.get("id"))
-                                    except Exception:
-                                        pass
-                                on_callback(data, cq, ack)
-                            continue
-
-                        msg = upd.get("message") or upd.get("edited_message")
-                        if msg and str(msg.get("chat", {}).get("id")) == str(self.cfg.chat_id):
-                            text = msg.get("text", "")
-                            on_message(text, msg)
+                        self._handle_update(upd, on_message, on_callback)
+                    errors = 0
                 except Exception:
-                    # keep alive, minimal error handling here
-                    pass
-                time.sleep(poll_interval)
+                    # keep alive, minimal error handling here; back off exponentially with jitter
+                    # so an API outage doesn't turn into a reconnect storm
+                    errors += 1
+                    delay = min(POLL_BACKOFF_MAX, poll_interval * 2 ** min(errors - 1, 10))
+                    self._stop.wait(delay * random.uniform(0.5, 1.0))
+                # No idle sleep otherwise: getUpdates already long-polls server-side
+                self._save_offset()
 
         self._stop.clear()
         self._thread = threading.Thread(target=_run, name="tg-poll", daemon=True)
         self._thread.start()
 
+    def start_webhook(self, url: str, port: int, on_message: Callable[[str, dict], None], on_callback: Optional[Callable[[str, dict, Callable[[], None]], None]] = None, host: str = "0.0.0.0") -> None:
+        """Receive updates pushed by Telegram instead of polling for them.
+
+        Serves plain HTTP on host:port; `url` is the public HTTPS address (e.g. a TLS
+        terminating reverse proxy) that forwards to it.
+        """
+        if self._server:
+            return
+        secret = secrets.token_urlsafe(32)
+        client = self
+
+        class _WebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                # Telegram echoes the secret registered with setWebhook; anything else is spoofed
+                token = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+                if not hmac.compare_digest(token, secret):
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self.send_response(200)
+                self.end_headers()
+                try:
+                    upd = orjson.loads(body)
+                    update_id = upd.get("update_id", 0)
+                    # Telegram retries deliveries; handle every update once
+                    if update_id < client._offset:
+                        return
+                    client._offset = update_id + 1
+                    client._handle_update(upd, on_message, on_callback)
+                    client._save_offset()
+                except Exception:
+                    # keep serving, minimal error handling here
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        # Single-threaded on purpose: updates are handled one at a time, as with polling
+        self._server = HTTPServer((host, port), _WebhookHandler)
+        threading.Thread(target=self._server.serve_forever, name="tg-webhook", daemon=True).start()
+        self._set_webhook(url, secret)
+
+    def _handle_update(self, upd: dict, on_message: Callable[[str, dict], None], on_callback: Optional[Callable[[str, dict, Callable[[], None]], None]]) -> None:
+        # Handle callback queries (inline keyboard)
+        if on_callback and upd.get("callback_query"):
+            cq = upd["callback_query"]
+            data = cq.get("data", "")
+            chat_id = cq.get("message", {}).get("chat", {}).get("id")
+            if chat_id == self._chat_id:
+                def ack():
+                    try:
+                        self._answer_callback_query(cq.get("id"))
+                    except Exception:
+                        pass
+                on_callback(data, cq, ack)
+            return
+
+        msg = upd.get("message") or upd.get("edited_message")
+        if msg and msg.get("chat", {}).get("id") == self._chat_id:
+            text = msg.get("text", "")
+            on_message(text, msg)
+
     def stop(self) -> None:
         self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
         if self._thread:
             self._thread.join(timeout=2)
+        with self._sender_lock:
+            sender, self._sender = self._sender, None
+        if sender:
+            # Flush what is already queued, then let the sender exit
+            self._outbox.put(None)
+            sender.join(timeout=5)
+        # Only drop the pool when the session is ours; an injected one belongs to the caller
+        if self.cfg.session is None:
+            self._session.close()
 
     def _get_updates(self):
         url = f"{self.base}/getUpdates"
-        params = {"offset": self._offset, "timeout": 20}
-        r = requests.get(url, params=params, timeout=35)
+        params = {"offset": self._offset, "limit": 100, "timeout": 30}
+        r = self._session.get(url, params=params, timeout=45)
+        r.raise_for_status()
+        body = r.content
+        if body == EMPTY_UPDATES:
+            return []
+        return orjson.loads(body).get("result", [])
+
+    def _save_offset(self) -> None:
+        if not self._offset_path or self._offset == self._saved_offset:
+            return
+        tmp = self._offset_path.with_name(self._offset_path.name + ".tmp")
+        try:
+            tmp.write_bytes(orjson.dumps({"offset": self._offset}))
+            os.replace(tmp, self._offset_path)  # atomic: never a half-written offset file
+            self._saved_offset = self._offset
+        except OSError:
+            pass
+
+    def _set_webhook(self, url: str, secret_token: str) -> None:
+        r = self._session.post(f"{self.base}/setWebhook", data=orjson.dumps({"url": url, "secret_token": secret_token}), headers=JSON_HEADERS, timeout=15)
+        r.raise_for_status()
+
+    def delete_webhook(self) -> None:
+        """Drop a registered webhook; getUpdates is refused while one is set"""
+        r = self._session.post(f"{self.base}/deleteWebhook", timeout=15)
         r.raise_for_status()
-        data = r.json()
-        return data.get("result", [])
 
     def _answer_callback_query(self, callback_query_id: str):
         url = f"{self.base}/answerCallbackQuery"
-        r = requests.post(url, json={"callback_query_id": callback_query_id}, timeout=15)
+        r = self._session.post(url, data=orjson.dumps({"callback_query_id": callback_query_id}), headers=JSON_HEADERS, timeout=15)
         r.raise_for_status()
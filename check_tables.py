@@ -1,4 +1,6 @@
 """Check which tables exist in task_log_db"""
+from contextlib import closing
+
 import pymysql
 
 HOST = "localhost"
@@ -17,16 +19,14 @@ try:
         charset='utf8mb4'
     )
 
-    cursor = conn.cursor()
-    cursor.execute("SHOW TABLES")
-    tables = cursor.fetchall()
+    # closing() releases the socket even when the query fails
+    with closing(conn), closing(conn.cursor()) as cursor:
+        cursor.execute("SHOW TABLES")
+        tables = cursor.fetchall()
 
     print(f"Tables in {DATABASE}:")
     for table in tables:
         print(f"  - {table[0]}")
 
-    cursor.close()
-    conn.close()
-
 except Exception as e:
     print(f"Error: {e}")
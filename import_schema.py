@@ -1,4 +1,6 @@
 """Import orchestration schema into MariaDB"""
+from contextlib import closing
+
 import pymysql
 
 # Connection settings from .env.example
@@ -15,55 +17,51 @@ def import_schema():
         with open("schema_orchestration.sql", "r", encoding="utf-8") as f:
             sql_script = f.read()
 
-        # Connect to MariaDB
+        # Drop comment lines once for the whole script, so a ';' inside a comment can't
+        # split a statement, then split into individual statements (simple split on ';')
+        sql_lines = [line for line in sql_script.splitlines() if not line.strip().startswith('--')]
+        statements = [s.strip() for s in '\n'.join(sql_lines).split(';') if s.strip()]
+
+        # Connect to MariaDB; closing() releases the socket even if the import fails midway
         conn = pymysql.connect(
             host=HOST,
             port=PORT,
             user=USER,
             password=PASSWORD,
             database=DATABASE,
-            charset='utf8mb4'
+            charset='utf8mb4',
+            # Every statement in the schema is DDL/GRANT, which MariaDB commits implicitly;
+            # autocommit saves the extra COMMIT round-trip per statement
+            autocommit=True
         )
 
-        print(f"[OK] Connected to MariaDB at {HOST}:{PORT}")
-
-        cursor = conn.cursor()
+        with closing(conn), closing(conn.cursor()) as cursor:
+            print(f"[OK] Connected to MariaDB at {HOST}:{PORT}")
 
-        # Split into individual statements (simple split on ';')
-        statements = [s.strip() for s in sql_script.split(';') if s.strip()]
+            executed = 0
+            for i, clean_statement in enumerate(statements, 1):
+                # Skip USE statements
+                if clean_statement.upper().startswith('USE '):
+                    continue
 
-        executed = 0
-        for i, statement in enumerate(statements, 1):
-            # Remove comments from statement (keep only SQL)
-            lines = statement.split('\n')
-            sql_lines = [line for line in lines if not line.strip().startswith('--')]
-            clean_statement = '\n'.join(sql_lines).strip()
-
-            # Skip empty statements and USE statements
-            if not clean_statement or clean_statement.upper().startswith('USE '):
-                continue
-
-            try:
-                # Extract first word for logging
-                first_word = clean_statement.split()[0].upper()
-                print(f"[EXEC] Statement {i}: {first_word}...")
-                cursor.execute(clean_statement)
-                conn.commit()
-                executed += 1
-                print(f"[OK] Statement {i}: {first_word} executed successfully")
-            except pymysql.Error as e:
-                print(f"[WARN] Statement {i} ({first_word}) failed: {e}")
-                # Continue with other statements
-                continue
+                try:
+                    # Extract first word for logging
+                    first_word = clean_statement.split()[0].upper()
+                    print(f"[EXEC] Statement {i}: {first_word}...")
+                    cursor.execute(clean_statement)
+                    executed += 1
+                    print(f"[OK] Statement {i}: {first_word} executed successfully")
+                except pymysql.Error as e:
+                    print(f"[WARN] Statement {i} ({first_word}) failed: {e}")
+                    # Continue with other statements
+                    continue
 
         print(f"\n[INFO] Executed {executed} statements successfully")
 
-        cursor.close()
-        conn.close()
-
         print("\n[SUCCESS] Schema import completed!")
         print("\nCreated tables:")
         print("  - agent_sessions")
+        print("  - agent_session_logs")
         print("  - agent_messages")
         print("  - orchestration_decisions")
         print("\nCreated views:")
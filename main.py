@@ -1,23 +1,91 @@
 """botMaster v2.0 - Main entry point"""
 import logging
+import os
+import queue
+import signal
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from botmaster import load_settings, Orchestrator
 
-# Setup logging
+# Write buffer for botmaster.log; a burst of records becomes one write()
+LOG_FILE_BUFFER = 64 * 1024
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler with a large write buffer that does not flush after every record"""
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_FILE_BUFFER, encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue runs empty"""
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+# Setup logging: callers only enqueue records; a listener thread does the stdout/file writes
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = FlushingQueueListener(
+    _log_queue,
+    logging.StreamHandler(sys.stdout),
+    BufferedFileHandler("botmaster.log"),
+    respect_handler_level=True
+)
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("botmaster.log")
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
 
 logger = logging.getLogger(__name__)
 
 
+def wait_for_shutdown() -> None:
+    """Block the main thread until SIGINT/SIGTERM, without periodic wakeups"""
+    stop = threading.Event()
+
+    def _request_stop(*_):
+        stop.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    # POSIX runs the handler during a blocking wait; Windows only between timed waits
+    wait_timeout = 1.0 if os.name == "nt" else None
+    while not stop.wait(wait_timeout):
+        pass
+
+
 def main():
     """Main entry point for botMaster orchestrator"""
+    log_listener.start()
+    try:
+        run()
+    finally:
+        # Writes out everything still queued
+        log_listener.stop()
+
+
+def run():
+    """Start the orchestrator and serve until shutdown"""
     logger.info("Starting botMaster v2.0 Orchestrator...")
 
     # Load settings
@@ -32,8 +100,9 @@ def main():
         logger.info("Starting Telegram bot interface...")
         try:
             orchestrator.start_telegram_bot()
-        except KeyboardInterrupt:
-            logger.info("Received interrupt, shutting down...")
+            # Polling runs on its own thread; keep the process alive until signalled
+            wait_for_shutdown()
+            logger.info("Received shutdown signal, shutting down...")
         except Exception as e:
             logger.error(f"Telegram bot error: {e}")
         finally:
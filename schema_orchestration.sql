@@ -25,6 +25,17 @@ CREATE TABLE IF NOT EXISTS agent_sessions (
     INDEX idx_started (started_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Agent Session Logs: Append-only output chunks, one INSERT per append instead of
+-- rewriting agent_sessions.output_log (which only holds logs written before this table)
+CREATE TABLE IF NOT EXISTS agent_session_logs (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    session_id VARCHAR(255) NOT NULL,
+    ts DATETIME DEFAULT CURRENT_TIMESTAMP,
+    chunk MEDIUMTEXT NOT NULL,
+    INDEX idx_session (session_id, id),
+    FOREIGN KEY (session_id) REFERENCES agent_sessions(session_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Agent Messages: Cross-agent communication and message queue
 CREATE TABLE IF NOT EXISTS agent_messages (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -89,6 +100,7 @@ ORDER BY timestamp ASC;
 
 -- Grant permissions (assuming mcp_admin user exists)
 GRANT SELECT, INSERT, UPDATE, DELETE ON task_log_db.agent_sessions TO 'mcp_admin'@'%';
+GRANT SELECT, INSERT, UPDATE, DELETE ON task_log_db.agent_session_logs TO 'mcp_admin'@'%';
 GRANT SELECT, INSERT, UPDATE, DELETE ON task_log_db.agent_messages TO 'mcp_admin'@'%';
 GRANT SELECT, INSERT, UPDATE, DELETE ON task_log_db.orchestration_decisions TO 'mcp_admin'@'%';
 GRANT SELECT ON task_log_db.active_agents TO 'mcp_admin'@'%';
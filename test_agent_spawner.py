@@ -1,4 +1,5 @@
 """Test agent spawner with a simple nested-claude task"""
+import subprocess
 import sys
 import time
 from pathlib import Path
@@ -43,19 +44,21 @@ def test_spawner():
         )
         print(f"[OK] Agent spawned: {session_id}")
 
-        # Wait a bit for completion
+        # Finished sessions stay available until cleanup_finished_sessions()
+        session = spawner.get_session(session_id)
+
+        # Block on the process itself instead of polling once per second
         print("\n[WAIT] Waiting for agent to complete (max 15 seconds)...")
-        for i in range(15):
-            time.sleep(1)
-            session = spawner.get_session(session_id)
-            if session and not session.is_running():
-                print(f"[OK] Agent completed after {i+1} seconds")
-                break
-            print(f"   ...{i+1}s", end="\r")
-        else:
-            print("\n[WARN] Agent still running after 15 seconds")
-
-        # Update status
+        start = time.monotonic()
+        try:
+            session.process.wait(timeout=15)
+            print(f"[OK] Agent completed after {time.monotonic() - start:.1f} seconds")
+        except subprocess.TimeoutExpired:
+            print("[WARN] Agent still running after 15 seconds")
+        # Let the reader drain what is left in the pipe
+        session.wait_output_closed(timeout=5)
+
+        # Update status (no-op once the reaper has recorded it)
         spawner.update_session_status(session_id)
 
         # Get output
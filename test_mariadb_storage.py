@@ -1,11 +1,12 @@
 """Test MariaDB storage client"""
 import sys
+import time
 from pathlib import Path
 
 # Add botmaster to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from botmaster.mariadb_storage import MariaDBStorage
+from botmaster.mariadb_storage import INSERT_DECISION_SQL, INSERT_MESSAGE_SQL, MariaDBStorage
 from datetime import datetime
 
 # Connection settings from .env.example
@@ -16,6 +17,20 @@ PASSWORD = "mcp_admin_password"
 DATABASE = "task_log_db"
 
 
+def test_bulk_insert_rewrite():
+    """Bulk INSERTs must match PyMySQL's executemany rewrite (one multi-row INSERT, one round-trip)"""
+    from pymysql.cursors import RE_INSERT_VALUES
+
+    ok = True
+    for name, sql in (("INSERT_MESSAGE_SQL", INSERT_MESSAGE_SQL), ("INSERT_DECISION_SQL", INSERT_DECISION_SQL)):
+        if RE_INSERT_VALUES.match(sql):
+            print(f"[OK] {name} is batched into one multi-row INSERT")
+        else:
+            print(f"[FAIL] {name} would be sent once per row")
+            ok = False
+    return ok
+
+
 def test_storage():
     """Test MariaDB storage operations"""
     storage = MariaDBStorage(
@@ -91,6 +106,19 @@ def test_storage():
     except Exception as e:
         print(f"[FAIL] Send message: {e}")
 
+    # Test 5b: Bulk send messages (one executemany round-trip instead of one per row)
+    print("\n[TEST] Bulk sending 100 inter-agent messages...")
+    try:
+        start = time.perf_counter()
+        sent = storage.send_messages_bulk([
+            (session_id, session_id, "notification", f"Bulk test message {i}", None)
+            for i in range(100)
+        ])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[OK] Bulk sent {sent} messages in {elapsed_ms:.1f} ms")
+    except Exception as e:
+        print(f"[FAIL] Bulk send messages: {e}")
+
     # Test 6: Get pending messages
     print("\n[TEST] Getting pending messages...")
     try:
@@ -156,4 +184,6 @@ def test_storage():
 
 
 if __name__ == "__main__":
+    test_bulk_insert_rewrite()
+    print()
     test_storage()
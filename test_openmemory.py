@@ -1,16 +1,20 @@
 """Test OpenMemory API connection"""
+import orjson
 import requests
 
 OPENMEMORY_URL = "http://localhost:8765"
 USER_ID = "markus"
+# One keep-alive connection for all checks instead of a new one per request
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
 
 def test_list_memories():
     """Test listing memories for user"""
     try:
         params = {"user_id": USER_ID}
-        r = requests.get(f"{OPENMEMORY_URL}/api/v1/memories/", params=params, timeout=5)
+        r = SESSION.get(f"{OPENMEMORY_URL}/api/v1/memories/", params=params, timeout=5)
         print(f"[OK] List memories: {r.status_code}")
-        data = r.json()
+        data = orjson.loads(r.content)
         print(f"   Found {len(data.get('results', []))} memories")
         return r.status_code == 200
     except Exception as e:
@@ -26,9 +30,9 @@ def test_add_memory():
             ],
             "user_id": USER_ID
         }
-        r = requests.post(f"{OPENMEMORY_URL}/api/v1/memories/", json=data, timeout=10)
+        r = SESSION.post(f"{OPENMEMORY_URL}/api/v1/memories/", data=orjson.dumps(data), timeout=10)
         print(f"[OK] Add memory: {r.status_code}")
-        result = r.json()
+        result = orjson.loads(r.content)
         print(f"   Memory ID: {result.get('id', 'N/A')}")
         return r.status_code in (200, 201)
     except Exception as e:
@@ -42,9 +46,9 @@ def test_search_memories():
             "query": "botMaster",
             "user_id": USER_ID
         }
-        r = requests.get(f"{OPENMEMORY_URL}/api/v1/memories/search/", params=params, timeout=10)
+        r = SESSION.get(f"{OPENMEMORY_URL}/api/v1/memories/search/", params=params, timeout=10)
         print(f"[OK] Search memories: {r.status_code}")
-        results = r.json()
+        results = orjson.loads(r.content)
         print(f"   Found {len(results.get('results', []))} matches")
         return r.status_code == 200
     except Exception as e:
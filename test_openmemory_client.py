@@ -81,6 +81,8 @@ def test_client():
     else:
         print("[WARN] Decision logging failed")
 
+    client.close()
+
     print("\n[SUCCESS] OpenMemory client testing completed!")
     print("\nNote: Some failures expected due to known OpenMemory API bugs.")
     print("This is acceptable - we'll use fallback strategies in production.")